@@ -0,0 +1,375 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+import csv_to_realbyte as converter
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+BANKS = ['kotak', 'kvb', 'equitas', 'axis']
+
+# Description templates; {n} is replaced with a merchant or reference id
+DESCRIPTIONS = [
+    'UPI/SWIGGY/{n}/Food order',
+    'UPI/ZOMATO LTD/{n}/Dinner',
+    'UPI/Taaza Thindi/{n}/Food out',
+    'UPI/A PERFECT COFFE/{n}/Coffee',
+    'UPI/UBER INDIA/{n}/Cab ride',
+    'UPI/OLA/{n}/ride',
+    'UPI/BMTC BUS/{n}/pass',
+    'IRCTC TRAIN TICKET {n}',
+    'UPI/AIRTEL/{n}/Mobile recharge',
+    'UPI/JIO PREPAID/{n}/recharge',
+    'BESCOM ELECTRICITY BILL {n}',
+    'NEFT/HOUSE RENT/{n}',
+    'UPI/APOLLO PHARMACY/{n}/medicine',
+    'ZERODHA BROKING {n}',
+    'SIP MUTUAL FUND {n}',
+    'AMAZON PAY INDIA {n}',
+    'FLIPKART INTERNET {n}',
+    'NETFLIX SUBSCRIPTION {n}',
+    'Int.Pd:{n}:01-04-2025 to 30-06-2025',
+    'SALARY CREDIT ACME CORP {n}',
+    'ATM WDL {n}',
+    'UPI/RAMESH KUMAR/{n}/Payment from phone',
+    'UPI/Q{n}@ybl/merchant',
+]
+
+AXIS_NOISE = [
+    'Credit Card Statement',
+    'Page 1 of 4',
+    'DATE TRANSACTION DETAILS MERCHANT CATEGORY AMOUNT (Rs.) CASHBACK EARNED',
+    'Payment Due Date 05/08/2025',
+    '',
+]
+
+def _amount_text(amount):
+    return f"{amount:,.2f}"
+
+def _random_rows(rows, seed):
+    """
+    Yield (date, description, amount, is_debit) tuples in date order
+    """
+    rng = random.Random(seed)
+    day = date(2015, 1, 1)
+    merchant_ids = [rng.randint(100000, 999999999) for _ in range(5000)]
+    for _ in range(rows):
+        if rng.random() < 0.3:
+            day += timedelta(days=1)
+        description = rng.choice(DESCRIPTIONS).format(n=rng.choice(merchant_ids))
+        amount = round(rng.uniform(1, 50000) if rng.random() < 0.1 else rng.uniform(1, 2000), 2)
+        yield day, description, amount, rng.random() < 0.8
+
+def _expected(trans_date, description, ref_no, amount, trans_type, account):
+    category, subcategory = reference_classify(description)
+    return converter.Transaction(trans_date, description, ref_no, amount, trans_type, category, subcategory, account)
+
+def generate_kotak(path, rows, seed=0, expected=None):
+    """
+    Write a synthetic Kotak statement CSV
+    """
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        file.write('"",,Account Statement\nXXXX  YYYY\n"Address1",,,,Cust. Reln. No.,XXXXXXXX\n""\n')
+        file.write('Sl. No.,Transaction Date,Value Date,Description,Chq / Ref No.,Amount,Dr / Cr,Balance,Dr / Cr\n')
+        for sl_no, (day, description, amount, is_debit) in enumerate(_random_rows(rows, seed), 1):
+            dr_cr = 'DR' if is_debit else 'CR'
+            file.write(f'{sl_no},{day:%d-%m-%Y} 10:{sl_no % 60:02d}:00,{day:%d-%m-%Y},{description},'
+                       f'UPI-{sl_no},"{_amount_text(amount)}",{dr_cr},"1,000.00",CR\n')
+            if expected is not None:
+                expected.append(_expected(f'{day:%d/%m/%Y}', description, '', amount,
+                                          'Expense' if is_debit else 'Income', 'Kotak'))
+        file.write('Closing balance,"as on 14/08/2025   INR 29,121.86"\n')
+
+def generate_kvb(path, rows, seed=0, expected=None):
+    """
+    Write a synthetic KVB statement CSV
+    """
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        file.write('Account Statement,,,,,,,\nName,XXXX,,,,,,\n,,,,,,,\n')
+        file.write('Transaction Date,Value Date,Branch,Cheque No.,Description,Debit,Credit,Balance\n')
+        for index, (day, description, amount, is_debit) in enumerate(_random_rows(rows, seed)):
+            debit, credit = (f'"{_amount_text(amount)}"', '') if is_debit else ('', f'"{_amount_text(amount)}"')
+            file.write(f'{day:%d-%m-%Y} 09:{index % 60:02d}:{index % 59:02d},{day:%d-%m-%Y},MG ROAD,,'
+                       f'{description},{debit},{credit},"1,000.00"\n')
+            if expected is not None:
+                # The KVB parser does not keep the description
+                expected.append(_expected(f'{day:%d/%m/%Y}', '', '', amount,
+                                          'Expense' if is_debit else 'Income', 'KVB'))
+
+def generate_equitas(path, rows, seed=0, expected=None):
+    """
+    Write a synthetic Equitas statement CSV
+    """
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        file.write('Equitas Small Finance Bank\nAccount Number,XXXXXXXX\n')
+        file.write('Date,Reference No. / Cheque No.,Narration,"Withdrawal\nINR","Deposit\nINR","Closing Balance\nINR"\n')
+        for index, (day, description, amount, is_debit) in enumerate(_random_rows(rows, seed)):
+            ref_no = f'REF{index}' if index % 7 else ''
+            withdrawal, deposit = (f'"{_amount_text(amount)}"', '') if is_debit else ('', f'"{_amount_text(amount)}"')
+            file.write(f'{day:%d-%b-%Y},{ref_no},{description},{withdrawal},{deposit},"1,000.00"\n')
+            if expected is not None:
+                # Blank reference numbers come out as 'nan', as they always have
+                expected.append(_expected(f'{day:%d/%m/%Y}', description, ref_no or 'nan', amount,
+                                          'Expense' if is_debit else 'Income', 'Equitas'))
+        file.write('*** End of the Statement ***,,,,,\n')
+
+def generate_axis(path, rows, seed=0, expected=None):
+    """
+    Write a synthetic Axis credit card statement text dump, with header and
+    footer noise lines between transactions
+    """
+    rng = random.Random(seed + 1)
+    with open(path, 'w', encoding='utf-8') as file:
+        for index, (day, description, amount, is_debit) in enumerate(_random_rows(rows, seed)):
+            if index % 40 == 0:
+                file.write('\n'.join(AXIS_NOISE) + '\n')
+            line = f'{day:%d/%m/%Y} {description.upper()}    {_amount_text(amount)} {"Dr" if is_debit else "Cr"}'
+            cashback = round(amount * 0.05, 2) if is_debit and rng.random() < 0.3 else 0.0
+            if cashback:
+                line += f' {_amount_text(cashback)} Cr'
+            file.write(line + '\n')
+            if expected is not None:
+                trans_date = f'{day:%d/%m/%Y}'
+                expected.append(_expected(trans_date, description.upper(), '', amount,
+                                          'Expense' if is_debit else 'Income', 'Axis Credit Card'))
+                if cashback:
+                    expected.append(_expected(trans_date, 'Cashback for ' + description.upper(), '', cashback,
+                                              'Income', 'Axis Credit Card'))
+
+GENERATORS = {
+    'kotak': generate_kotak,
+    'kvb': generate_kvb,
+    'equitas': generate_equitas,
+    'axis': generate_axis,
+}
+
+STATEMENT_NAMES = {
+    'kotak': 'kotak.csv',
+    'kvb': 'kvb.csv',
+    'equitas': 'equitas.csv',
+    'axis': 'axis.txt',
+}
+
+def reference_classify(description):
+    """
+    Straightforward keyword loop over the rule tables, used as the oracle for
+    the compiled matcher
+    """
+    description = description.lower()
+
+    def found(keyword):
+        if converter._is_abbreviation(keyword):
+            return re.search(r'\b' + re.escape(keyword.lower()) + r'\b', description) is not None
+        return keyword.lower() in description
+
+    category = next((category for category, keywords in converter.CATEGORY_KEYWORDS.items()
+                     if any(map(found, keywords))), 'unknown')
+    subcategory = next((subcategory for subcategory, keywords in converter.SUBCATEGORY_KEYWORDS.get(category, [])
+                        if any(map(found, keywords))), '')
+    return category, subcategory
+
+# Descriptions whose categories are known independently of both matchers
+KNOWN_CATEGORIES = [
+    ('EMISSION TEST CENTRE 1234', ('Transportation', 'Vehicle Service')),
+    ('AUTO STAND', ('Transportation', '')),
+    ('KSRTC ST BUS PASS', ('Transportation', 'Bus')),
+    ('UPI/NEIGHBOURHOOD V/123', ('Food', '')),
+    ('GROCERIES', ('Food', 'Vegis/Groceries')),
+    ('UPI/SWIGGY/991/Food order', ('Food', 'Eating out')),
+]
+
+def check_known_categories():
+    """
+    Return a description of every known case that the converter or the
+    reference loop categorizes differently than expected
+    """
+    converter.open_category_cache(None)
+    problems = []
+    for description, expected in KNOWN_CATEGORIES:
+        for name, classify in (('converter', converter.classify_description), ('reference', reference_classify)):
+            got = classify(description)
+            if got != expected:
+                problems.append(f"rules: {name} categorizes {description!r} as {got}, expected {expected}")
+    return problems
+
+def reference_normalize_date(value, source_format):
+    return datetime.strptime(value, source_format).strftime(converter.TARGET_DATE_FORMAT)
+
+def _parse_quietly(bank, path):
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        return converter.PARSERS[bank](path) or []
+
+def _timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+def _date_inputs(transactions, bank):
+    """
+    Rebuild the raw date strings a bank's parser normalizes
+    """
+    formats = {'kotak': ('%d-%m-%Y', '%d-%m-%Y'), 'kvb': ('%d-%m-%Y %H:%M:%S', '%d-%m-%Y 09:15:30'),
+               'axis': ('%d/%m/%Y', '%d/%m/%Y'), 'equitas': ('%d-%b-%Y', '%d-%b-%Y')}
+    source_format, render = formats[bank]
+    return source_format, [datetime.strptime(t.transaction_date, '%d/%m/%Y').strftime(render) for t in transactions]
+
+def benchmark_bank(bank, rows, work_dir, repeat=1, seed=0):
+    """
+    Time each stage for one bank and size; returns a list of result records
+    """
+    path = os.path.join(work_dir, f'{rows}_{STATEMENT_NAMES[bank]}')
+    GENERATORS[bank](path, rows, seed)
+
+    def best(function, *args):
+        times = []
+        result = None
+        for _ in range(repeat):
+            # Start every run cold so the caches do not flatter later repeats
+            converter.open_category_cache(None)
+            converter._normalize_fixed_width_date.cache_clear()
+            converter._normalize_date_slow.cache_clear()
+            elapsed, result = _timed(function, *args)
+            times.append(elapsed)
+        return min(times), result
+
+    parse_time, transactions = best(_parse_quietly, bank, path)
+    descriptions = [t.description for t in transactions]
+    categorize_time, _ = best(lambda: [converter._classify_uncached(d) for d in descriptions])
+    cached_time, _ = best(lambda: [converter.classify_description(d) for d in descriptions])
+    source_format, date_values = _date_inputs(transactions, bank)
+    dates_time, _ = best(lambda: [converter.normalize_date(v, source_format) for v in date_values])
+
+    output_file = os.path.join(work_dir, f'{rows}_{bank}_out.tsv')
+
+    def write():
+        if os.path.exists(output_file):
+            os.remove(output_file)
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            converter.create_realbyte_import_file(transactions, output_file)
+    write_time, _ = best(write)
+
+    stages = {
+        'parse': parse_time,
+        'categorize': categorize_time,
+        'categorize_cached': cached_time,
+        'dates': dates_time,
+        'write': write_time,
+    }
+    return [
+        {
+            'bank': bank,
+            'rows': rows,
+            'transactions': len(transactions),
+            'stage': stage,
+            'seconds': round(seconds, 6),
+            'rows_per_second': round(len(transactions) / seconds) if seconds else None,
+        }
+        for stage, seconds in stages.items()
+    ]
+
+def check_bank(bank, rows, work_dir, seed=0):
+    """
+    Compare the parser output for a synthetic statement with what the
+    generator says it should be, categorized by the reference loop.
+    Returns a list of mismatch descriptions (empty when identical).
+    """
+    path = os.path.join(work_dir, f'check_{STATEMENT_NAMES[bank]}')
+    expected = []
+    GENERATORS[bank](path, rows, seed, expected)
+    converter.open_category_cache(None)
+    actual = _parse_quietly(bank, path)
+
+    problems = []
+    if len(actual) != len(expected):
+        problems.append(f"{bank}: {len(actual)} transactions parsed, {len(expected)} expected")
+    for index, (got, want) in enumerate(zip(actual, expected)):
+        if got != want:
+            problems.append(f"{bank}: transaction {index} differs: got {got}, expected {want}")
+            break
+
+    source_format, date_values = _date_inputs(expected, bank)
+    for value in set(date_values):
+        if converter.normalize_date(value, source_format) != reference_normalize_date(value, source_format):
+            problems.append(f"{bank}: date {value!r} normalized differently from strptime")
+            break
+    return problems
+
+def measure_startup(repeat=5):
+    """
+    Time a cold interpreter importing the converter, and check that pandas is
+    not pulled in by the import alone. Returns a result record.
+    """
+    script = "import sys, csv_to_realbyte; print('pandas' in sys.modules)"
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    times = []
+    pandas_loaded = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True,
+                                cwd=package_dir, check=True).stdout
+        times.append(time.perf_counter() - start)
+        pandas_loaded = output.strip() == 'True'
+    return {'bank': None, 'rows': 0, 'transactions': 0, 'stage': 'startup',
+            'seconds': round(min(times), 6), 'rows_per_second': None, 'pandas_loaded': pandas_loaded}
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the statement parsers and the RealByte writer on synthetic data")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="statement sizes in rows")
+    parser.add_argument('--banks', nargs='+', choices=BANKS, default=BANKS, help="banks to benchmark")
+    parser.add_argument('--repeat', type=int, default=1, help="runs per stage; the fastest is reported")
+    parser.add_argument('--output', default='bench_output.json', help="JSON file for the results")
+    parser.add_argument('--check', action='store_true', help="verify parser output against the reference instead of timing")
+    parser.add_argument('--seed', type=int, default=0, help="seed for the synthetic statements")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        if args.check:
+            problems = check_known_categories()
+            print(f"{'rules':8} {len(KNOWN_CATEGORIES):>8} cases: {'OK' if not problems else 'MISMATCH'}")
+            for bank in args.banks:
+                for rows in args.sizes:
+                    bank_problems = check_bank(bank, rows, work_dir, args.seed)
+                    print(f"{bank:8} {rows:>8} rows: {'OK' if not bank_problems else 'MISMATCH'}")
+                    problems.extend(bank_problems)
+            for problem in problems:
+                print(problem)
+            raise SystemExit(1 if problems else 0)
+
+        results = [measure_startup()]
+        print(f"{'startup':8} {'':>8}       {'import':18} {results[0]['seconds']:10.4f}s"
+              f"  (pandas loaded: {results[0]['pandas_loaded']})")
+        for bank in args.banks:
+            for rows in args.sizes:
+                bank_results = benchmark_bank(bank, rows, work_dir, args.repeat, args.seed)
+                for result in bank_results:
+                    print(f"{bank:8} {rows:>8} rows  {result['stage']:18} {result['seconds']:10.4f}s")
+                results.extend(bank_results)
+
+    report = {
+        'revision': _git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2)
+    print(f"Results saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
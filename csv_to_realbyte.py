@@ -1,572 +1,3013 @@
+import argparse
 import csv
+import hashlib
+import itertools
+import json
+import mmap
 import re
-import pandas as pd
+import signal
+import sqlite3
+import time
+from array import array
 from datetime import datetime
 import sys
 import os
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from functools import lru_cache
+from io import StringIO
 
-def parse_kotak_statement(input_file):
+# Bank name -> parser returning all transactions, and bank name -> streaming
+# parser yielding them one at a time. Banks register with @register_parser.
+PARSERS = {}
+STREAMING_PARSERS = {}
+
+def register_parser(bank, streaming=False):
     """
-    Parse Kotak Mahindra Bank statement CSV file and extract transaction data
+    Decorator registering a statement parser for a bank
     """
-    # Read the entire file content
-    with open(input_file, 'r', encoding='utf-8') as file:
-        content = file.readlines()
-    
-    # Find the line where transaction details start
-    transaction_start = 0
-    for i, line in enumerate(content):
-        if 'Sl. No.,Transaction Date,Value Date,Description' in line:
-            transaction_start = i
-            break
-    
-    if transaction_start == 0:
-        print("Error: Could not find transaction details header in the statement")
-        return None
-    
-    # Create a list to store transaction data
-    transactions = []
-    
-    # Process transaction lines
-    for line in content[transaction_start+1:]:
-        # Skip empty lines
-        if not line.strip():
-            continue
-        
-        # Parse the CSV line
+    def register(function):
+        (STREAMING_PARSERS if streaming else PARSERS)[bank] = function
+        return function
+    return register
+
+def get_parser(bank, streaming=False):
+    """
+    Return the parser for a bank, preferring the streaming one if asked and available
+    """
+    if streaming and bank in STREAMING_PARSERS:
+        return STREAMING_PARSERS[bank]
+    return PARSERS[bank]
+
+KOTAK_HEADER = 'Sl. No.,Transaction Date,Value Date,Description'
+KVB_HEADER = 'Transaction Date,Value Date,Branch,Cheque No.,Description,Debit,Credit,Balance'
+
+TARGET_DATE_FORMAT = '%d/%m/%Y'
+
+# Fixed-width fast paths for the bank date formats: a DD?MM?YYYY date part
+# plus the exact text allowed after it (e.g. KVB's time of day)
+_DATE_FAST_PATHS = {
+    '%d-%m-%Y': (re.compile(r'\d{2}-\d{2}-\d{4}'), None),
+    '%d/%m/%Y': (re.compile(r'\d{2}/\d{2}/\d{4}'), None),
+    '%d-%m-%Y %H:%M:%S': (re.compile(r'\d{2}-\d{2}-\d{4}'),
+                          re.compile(r' (?:[01]\d|2[0-3]):[0-5]\d:[0-5]\d')),
+}
+
+def normalize_date(value, source_format):
+    """
+    Convert a date string in source_format to DD/MM/YYYY.
+    Raises ValueError for invalid dates, like datetime.strptime.
+    """
+    fast_path = _DATE_FAST_PATHS.get(source_format)
+    if fast_path is not None:
+        date_pattern, time_pattern = fast_path
+        date_part, rest = value[:10], value[10:]
+        if date_pattern.fullmatch(date_part) and (time_pattern.fullmatch(rest) if time_pattern else not rest):
+            return _normalize_fixed_width_date(date_part)
+    return _normalize_date_slow(value, source_format)
+
+@lru_cache(maxsize=4096)
+def _normalize_fixed_width_date(date_part):
+    # A statement has few distinct dates, so each is validated only once
+    day, month, year = date_part[0:2], date_part[3:5], date_part[6:10]
+    datetime(int(year), int(month), int(day))
+    if date_part[2] == '/':
+        return date_part  # already DD/MM/YYYY
+    return f"{day}/{month}/{year}"
+
+@lru_cache(maxsize=4096)
+def _normalize_date_slow(value, source_format):
+    return datetime.strptime(value, source_format).strftime(TARGET_DATE_FORMAT)
+
+TRANSACTION_FIELDS = ('transaction_date', 'description', 'ref_no', 'amount', 'type', 'category', 'subcategory', 'account')
+
+class Transaction:
+    """
+    A single parsed transaction. Uses __slots__ so millions of them take a
+    fraction of the memory of per-row dicts.
+    """
+    __slots__ = TRANSACTION_FIELDS
+
+    def __init__(self, transaction_date, description, ref_no, amount, type, category, subcategory, account):
+        self.transaction_date = transaction_date  # DD/MM/YYYY
+        self.description = description
+        self.ref_no = ref_no
+        self.amount = amount
+        self.type = type  # 'Expense' or 'Income'
+        self.category = category
+        self.subcategory = subcategory
+        self.account = account
+
+    def __eq__(self, other):
+        if not isinstance(other, Transaction):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in TRANSACTION_FIELDS)
+
+    def __repr__(self):
+        return 'Transaction(' + ', '.join(f'{field}={getattr(self, field)!r}' for field in TRANSACTION_FIELDS) + ')'
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in TRANSACTION_FIELDS}
+
+class TransactionBatch:
+    """
+    Columnar container for many transactions. Amounts live in a float array
+    and values that repeat across rows (dates, types, categories, accounts)
+    are stored once and referenced by integer codes. Iterating yields
+    Transaction objects one at a time, so a batch never holds per-row objects.
+    """
+
+    def __init__(self, transactions=()):
+        self.dates = array('I')
+        self.descriptions = []
+        self.ref_nos = []
+        self.amounts = array('d')
+        self.types = array('I')
+        self.categories = array('I')
+        self.subcategories = array('I')
+        self.accounts = array('I')
+        self.values = []  # interned values, indexed by code
+        self.codes = {}   # value -> code
+        self.extend(transactions)
+
+    def _code(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def add(self, transaction_date, description, ref_no, amount, type, category, subcategory, account):
+        """
+        Append one transaction from its field values, without building an object
+        """
+        code = self._code
+        self.dates.append(code(transaction_date))
+        self.descriptions.append(description)
+        self.ref_nos.append(ref_no)
+        self.amounts.append(amount)
+        self.types.append(code(type))
+        self.categories.append(code(category))
+        self.subcategories.append(code(subcategory))
+        self.accounts.append(code(account))
+
+    def extend_columns(self, dates, descriptions, ref_nos, amounts, types, categories, subcategories, accounts):
+        """
+        Append many transactions at once from whole columns, for the
+        vectorized parsers. dates, types, categories, subcategories and
+        accounts are (codes, values) pairs, as from pandas.factorize: a NumPy
+        array of indexes into a list of the distinct values.
+        """
+        import numpy as np
+
+        for column, (codes, values) in ((self.dates, dates), (self.types, types), (self.categories, categories),
+                                        (self.subcategories, subcategories), (self.accounts, accounts)):
+            mapping = np.array([self._code(value) for value in values], dtype=np.uintc)
+            column.frombytes(mapping[codes].tobytes())
+        self.descriptions.extend(descriptions)
+        self.ref_nos.extend(ref_nos)
+        self.amounts.frombytes(np.asarray(amounts, dtype=np.float64).tobytes())
+
+    def append(self, trans):
+        self.add(trans.transaction_date, trans.description, trans.ref_no, trans.amount,
+                 trans.type, trans.category, trans.subcategory, trans.account)
+
+    def extend(self, transactions):
+        if isinstance(transactions, TransactionBatch):
+            for index in range(len(transactions)):
+                self.add(*transactions._fields(index))
+            return
+        for trans in transactions:
+            self.append(trans)
+
+    def _fields(self, index):
+        values = self.values
+        return (values[self.dates[index]], self.descriptions[index], self.ref_nos[index], self.amounts[index],
+                values[self.types[index]], values[self.categories[index]], values[self.subcategories[index]],
+                values[self.accounts[index]])
+
+    def __len__(self):
+        return len(self.amounts)
+
+    def __getitem__(self, index):
+        return Transaction(*self._fields(index))
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield Transaction(*self._fields(index))
+
+    def __eq__(self, other):
+        if not isinstance(other, TransactionBatch):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def reorder(self, order):
+        """
+        Rearrange the rows in place to the given sequence of row indexes
+        """
+        self.dates = array('I', (self.dates[i] for i in order))
+        self.descriptions = [self.descriptions[i] for i in order]
+        self.ref_nos = [self.ref_nos[i] for i in order]
+        self.amounts = array('d', (self.amounts[i] for i in order))
+        self.types = array('I', (self.types[i] for i in order))
+        self.categories = array('I', (self.categories[i] for i in order))
+        self.subcategories = array('I', (self.subcategories[i] for i in order))
+        self.accounts = array('I', (self.accounts[i] for i in order))
+
+    def sort_by_date(self):
+        """
+        Stable sort by transaction date; each distinct date is keyed only once
+        """
+        keys = {code: _date_sort_key(self.values[code]) for code in set(self.dates)}
+        dates = self.dates
+        self.reorder(sorted(range(len(self)), key=lambda i: keys[dates[i]]))
+
+    def split_by_account(self):
+        """
+        Return a dict of account name -> TransactionBatch, in first-seen order
+        """
+        batches = {}
+        for index in range(len(self)):
+            account = self.values[self.accounts[index]]
+            batch = batches.get(account)
+            if batch is None:
+                batch = batches[account] = TransactionBatch()
+            batch.add(*self._fields(index))
+        return batches
+
+    def recategorize(self):
+        """
+        Categorize every row again with the current rules, each distinct
+        description only once
+        """
+        results = {description: classify_description(description) for description in set(self.descriptions)}
+        code = self._code
+        self.categories = array('I', (code(results[description][0]) for description in self.descriptions))
+        self.subcategories = array('I', (code(results[description][1]) for description in self.descriptions))
+
+    def to_arrow(self):
+        """
+        Return the batch as a pyarrow Table. Numeric columns share the
+        batch's memory and repeated values become dictionary columns.
+        """
+        import pyarrow as pa
+
+        values = pa.array(self.values, type=pa.string())
+
+        def coded(codes):
+            indices = pa.Array.from_buffers(pa.uint32(), len(codes), [None, pa.py_buffer(codes)])
+            return pa.DictionaryArray.from_arrays(indices, values)
+
+        return pa.table({
+            'transaction_date': coded(self.dates),
+            'description': pa.array(self.descriptions, type=pa.string()),
+            'ref_no': pa.array(self.ref_nos, type=pa.string()),
+            'amount': pa.Array.from_buffers(pa.float64(), len(self.amounts), [None, pa.py_buffer(self.amounts)]),
+            'type': coded(self.types),
+            'category': coded(self.categories),
+            'subcategory': coded(self.subcategories),
+            'account': coded(self.accounts),
+        })
+
+    @classmethod
+    def from_arrow(cls, table):
+        """
+        Build a batch from a Table written by to_arrow
+        """
+        batch = cls()
+        mappings = []  # (dictionary, codes of its values); to_arrow gives every column the same one
+
+        def codes(column):
+            column = table.column(column).combine_chunks()
+            for dictionary, mapping in mappings:
+                if dictionary.equals(column.dictionary):
+                    break
+            else:
+                mapping = [batch._code(value) for value in column.dictionary.to_pylist()]
+                mappings.append((column.dictionary, mapping))
+            indices = column.indices.to_pylist()
+            if mapping == list(range(len(mapping))):
+                return array('I', indices)
+            return array('I', (mapping[index] for index in indices))
+
+        batch.dates = codes('transaction_date')
+        batch.descriptions = table.column('description').to_pylist()
+        batch.ref_nos = table.column('ref_no').to_pylist()
+        batch.amounts = array('d', table.column('amount').to_pylist())
+        batch.types = codes('type')
+        batch.categories = codes('category')
+        batch.subcategories = codes('subcategory')
+        batch.accounts = codes('account')
+        return batch
+
+def _date_sort_key(date):
+    # DD/MM/YYYY -> (YYYY, MM, DD)
+    return date[6:10], date[3:5], date[0:2]
+
+class PipelineStats:
+    """
+    Wall time and row counts per (scope, stage) plus event counters, shown by
+    --stats and saved as JSON with --stats-file
+    """
+
+    def __init__(self):
+        self.stages = {}    # (scope, stage) -> [seconds, rows]
+        self.counters = {}  # (scope, counter) -> count
+
+    def add(self, scope, stage, seconds, rows=0):
+        entry = self.stages.setdefault((scope, stage), [0.0, 0])
+        entry[0] += seconds
+        entry[1] += rows
+
+    def count(self, scope, counter, n=1):
+        self.counters[(scope, counter)] = self.counters.get((scope, counter), 0) + n
+
+    @contextmanager
+    def timer(self, scope, stage, rows=0):
+        start = time.perf_counter()
         try:
-            row = next(csv.reader([line]))
-            
-            # Check if this is a valid transaction row
-            if len(row) >= 8 and re.match(r'\d+', row[0]):
-                # Extract transaction data
-                sl_no = row[0]
-                trans_date = row[1]
-                value_date = row[2]
-                description = row[3]
-                ref_no = ''    #row[4]
-                amount = row[5].replace(',', '') if row[5] else '0'
-                dr_cr = row[6]
-                balance = row[7]
-                date_part = trans_date.split()[0] if ' ' in trans_date else trans_date
-                category = categorize_transaction(description)
-                subcategory = get_subcategory(category, description)
-
-                # Process and add to transactions list
-                transactions.append({
-                    
-                    'transaction_date': datetime.strptime(date_part, '%d-%m-%Y').strftime('%d/%m/%Y'),  # Convert to DD/MM/YYYY
-                    'description': description,
-                    'ref_no': ref_no,
-                    'amount': float(amount.replace(',', '')),
-                    'type': 'Expense' if dr_cr == 'DR' else 'Income',
-                    'category': category,
-                    'subcategory': subcategory,
-                    'account': 'Kotak'  # Default account name
-                })
-        except Exception as e:
-            print(f"Error processing line: {line}")
-            print(f"Error details: {e}")
-            continue
-    
-    return transactions
+            yield
+        finally:
+            self.add(scope, stage, time.perf_counter() - start, rows)
+
+    def reset(self):
+        self.stages.clear()
+        self.counters.clear()
+
+    def to_dict(self):
+        return {
+            'stages': [{'scope': scope, 'stage': stage, 'seconds': round(seconds, 6), 'rows': rows}
+                       for (scope, stage), (seconds, rows) in self.stages.items()],
+            'counters': [{'scope': scope, 'counter': counter, 'count': count}
+                         for (scope, counter), count in self.counters.items()],
+        }
+
+    def merge(self, data):
+        """
+        Add the numbers from another to_dict() result, e.g. from a worker process
+        """
+        for entry in data['stages']:
+            self.add(entry['scope'], entry['stage'], entry['seconds'], entry['rows'])
+        for entry in data['counters']:
+            self.count(entry['scope'], entry['counter'], entry['count'])
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.to_dict(), file, indent=2)
 
-def parse_kvb_statement(input_file):
+    def summary_table(self):
+        lines = [f"{'Scope':<10} {'Stage':<15} {'Seconds':>10} {'Rows':>10} {'Rows/s':>12}"]
+        for (scope, stage), (seconds, rows) in self.stages.items():
+            rate = f"{rows / seconds:,.0f}" if rows and seconds else '-'
+            lines.append(f"{scope:<10} {stage:<15} {seconds:>10.4f} {rows or '-':>10} {rate:>12}")
+        if self.counters:
+            lines.append('')
+            lines.append(f"{'Scope':<10} {'Counter':<17} {'Count':>10}")
+            for (scope, counter), count in self.counters.items():
+                lines.append(f"{scope:<10} {counter:<17} {count:>10}")
+        return '\n'.join(lines)
+
+_stats = PipelineStats()
+
+# How many rejected rows and skipped lines to show as examples in console summaries
+MAX_WARNING_SAMPLES = 10
+
+class TooManyErrors(Exception):
     """
-    Parse KVB Bank statement CSV file and extract transaction data
+    Raised when a statement has more errors than --max-errors allows.
+    A worker process passes its quarantine counts back as the second argument.
     """
-    # Read the entire file content
-    print(f"Reading KVB statement from {input_file}")
-    with open(input_file, 'r', encoding='utf-8') as file:
-        content = file.readlines()
 
-    # Find the line where transaction details start
-    transaction_start = 0
-    for i, line in enumerate(content):
-        if 'Transaction Date,Value Date,Branch,Cheque No.,Description,Debit,Credit,Balance' in line:
-            transaction_start = i
-            break
+    def __str__(self):
+        return self.args[0]
 
-    if transaction_start == 0:
-        print("Error: Could not find transaction details header in the statement")
-        return None
+class ErrorQuarantine:
+    """
+    Collects the rows parsers reject instead of printing each of them: every
+    row goes to a JSON Lines side file (created on the first one) with its
+    file, line number, error type, reason and raw text, and is counted by
+    error type for a bounded console summary. A statement with more than
+    max_errors rejected rows is abandoned with TooManyErrors. Lines that are
+    simply not transactions are neither written nor counted as errors, but
+    the first few the Axis parser skips are kept as samples, so a statement
+    whose lines all fail to match shows why.
+    """
 
-    # Create a list to store transaction data
-    transactions = []
+    def __init__(self, path=None, max_errors=None):
+        self.path = path
+        self.max_errors = max_errors
+        self.file = None
+        self.counts = {}  # error type -> count
+        self.samples = []
+        self.skipped = []  # samples of skipped lines
+        self.errors = {}  # statement -> errors so far
 
-    # Process transaction lines
-    for line in content[transaction_start+1:]:
-        # Skip empty lines
-        if not line.strip():
-            continue
+    @staticmethod
+    def _escape(text):
+        if not text.isascii():
+            # Bytes that are not UTF-8 are kept as \x escapes
+            text = text.encode('utf-8', 'surrogateescape').decode('utf-8', 'backslashreplace')
+        return text
+
+    def add(self, source, line, error, reason, text):
+        self.counts[error] = self.counts.get(error, 0) + 1
+        record = {'file': source, 'line': line, 'error': error, 'reason': reason, 'text': self._escape(text)}
+        if len(self.samples) < MAX_WARNING_SAMPLES:
+            self.samples.append(record)
+        if self.path:
+            if self.file is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                # Appending line by line lets worker processes share the file
+                self.file = open(self.path, 'a', encoding='utf-8', buffering=1)
+            self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        errors = self.errors[source] = self.errors.get(source, 0) + 1
+        if self.max_errors is not None and errors > self.max_errors:
+            raise TooManyErrors(f"{source}: more than {self.max_errors} errors, giving up on this statement")
+
+    def wants_skipped(self):
+        return len(self.skipped) < MAX_WARNING_SAMPLES
+
+    def skip(self, source, line, text):
+        """
+        Keep a line that a parser skipped as a sample, if there are not enough yet
+        """
+        if self.wants_skipped():
+            self.skipped.append({'file': source, 'line': line, 'text': self._escape(text)})
+
+    def reset(self):
+        self.counts.clear()
+        self.samples.clear()
+        self.skipped.clear()
+        self.errors.clear()
+
+    def to_dict(self):
+        return {'counts': dict(self.counts), 'samples': list(self.samples), 'skipped': list(self.skipped)}
+
+    def merge(self, data):
+        """
+        Add the counts and samples from another to_dict() result, e.g. from a worker process
+        """
+        for error, count in data['counts'].items():
+            self.counts[error] = self.counts.get(error, 0) + count
+        self.samples.extend(data['samples'][:MAX_WARNING_SAMPLES - len(self.samples)])
+        self.skipped.extend(data['skipped'][:MAX_WARNING_SAMPLES - len(self.skipped)])
 
-        # Parse the CSV line
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def summary(self):
+        """
+        Return a few lines describing the rejected rows and skipped lines, or
+        None if there were none
+        """
+        if not self.counts and not self.skipped:
+            return None
+        lines = []
+        if self.counts:
+            total = sum(self.counts.values())
+            lines.append(f"Quarantined {total} rows: " +
+                         ', '.join(f"{count} {error}" for error, count in self.counts.items()))
+            for record in self.samples:
+                lines.append(f"    {record['file']}:{record['line']}: {record['error']}: {record['reason']}: "
+                             f"{record['text'][:120]}")
+            if total > len(self.samples):
+                lines.append(f"    ... and {total - len(self.samples)} more")
+            if self.path:
+                lines.append(f"All rejected rows are listed in {self.path}")
+        if self.skipped:
+            lines.append("Skipped lines that are not transactions, for example:")
+            for record in self.skipped:
+                lines.append(f"    {record['file']}:{record['line']}: {record['text'][:120]}")
+        return '\n'.join(lines)
+
+_quarantine = ErrorQuarantine()
+
+def open_quarantine(path=None, max_errors=None):
+    """
+    Send rejected rows to a new quarantine writing to path (if given) and return it
+    """
+    global _quarantine
+    _quarantine.close()
+    _quarantine = ErrorQuarantine(path, max_errors)
+    return _quarantine
+
+class ParserTimer:
+    """
+    Accumulates one parser's stage times and counters while it runs and
+    reports them to the pipeline stats when it finishes. Streaming parsers
+    pause it while their consumer has control, so 'parse' is only the
+    parser's own time.
+    """
+
+    def __init__(self, scope, source=None):
+        self.scope = scope
+        self.source = source
+        self.elapsed = 0.0
+        self.started = time.perf_counter()
+        self.times = {'read': 0.0, 'header_search': 0.0, 'categorize': 0.0, 'dates': 0.0}
+        self.counts = {'rows': 0, 'transactions': 0, 'skipped': 0, 'errors': 0, 'unknown_category': 0}
+        self.header = None
+        self._header_line = None
+
+    def pause(self):
+        self.elapsed += time.perf_counter() - self.started
+
+    def resume(self):
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
         try:
-            row = next(csv.reader([line]))
-
-            # Check if this is a valid transaction row
-            if len(row) >= 8:
-                # Extract transaction data
-                trans_date = row[0]
-                value_date = row[1]
-                description = "" #row[4]
-                debit = row[5].replace(',', '') if row[5] else '0'
-                credit = row[6].replace(',', '') if row[6] else '0'
-                balance = row[7].replace(',', '')
-
-                # Determine transaction type and amount
-                if float(debit) > 0:
-                    amount = float(debit)
-                    trans_type = 'Expense'
-                else:
-                    amount = float(credit)
-                    trans_type = 'Income'
-
-                category = categorize_transaction(description)
-                subcategory = get_subcategory(category, description)
-
-                # Process and add to transactions list
-                transactions.append({
-                    'transaction_date': datetime.strptime(trans_date, '%d-%m-%Y %H:%M:%S').strftime('%d/%m/%Y'),
-                    'description': description,
-                    'ref_no': "", #row[3],
-                    'amount': amount,
-                    'type': trans_type,
-                    'category': category,
-                    'subcategory': subcategory,
-                    'account': 'KVB'  # Default account name
-                })
-        except Exception as e:
-            print(f"Error processing line: {line}")
-            print(f"Error details: {e}")
-            continue
+            yield
+        finally:
+            self.times[name] += time.perf_counter() - start
 
-    return transactions
+    def classify(self, description):
+        start = time.perf_counter()
+        result = classify_description(description)
+        self.times['categorize'] += time.perf_counter() - start
+        return result
+
+    def accept(self, category):
+        """
+        Count a transaction the parser is about to produce
+        """
+        self.counts['transactions'] += 1
+        if category == 'unknown':
+            self.counts['unknown_category'] += 1
+
+    def header_line(self):
+        """
+        Return the line number of the statement's header, only counting the
+        lines before it once a row is rejected
+        """
+        if self._header_line is None:
+            input_file, header_offset, lines_before = self.header
+            self._header_line = _line_number_at(input_file, header_offset) + lines_before
+        return self._header_line
+
+    def error(self, line, error, reason, text):
+        """
+        Count a row that looked like a transaction but could not be converted
+        and send it to the quarantine
+        """
+        self.counts['errors'] += 1
+        _quarantine.add(self.source, line, error, reason, text)
+
+    def normalize_date(self, value, source_format):
+        start = time.perf_counter()
+        try:
+            return normalize_date(value, source_format)
+        finally:
+            self.times['dates'] += time.perf_counter() - start
+
+    def finish(self):
+        self.pause()
+        transactions = self.counts['transactions']
+        for name in ('read', 'header_search'):
+            if self.times[name]:
+                _stats.add(self.scope, name, self.times[name])
+        _stats.add(self.scope, 'parse', self.elapsed - sum(self.times.values()), self.counts['rows'])
+        _stats.add(self.scope, 'categorize', self.times['categorize'], transactions)
+        _stats.add(self.scope, 'dates', self.times['dates'], transactions)
+        for name, count in self.counts.items():
+            _stats.count(self.scope, name, count)
+
+SNIFF_BYTES = 64 * 1024
+
+# Header signatures per bank, tried in order. Each pattern matches from the
+# start of the line where the parser should begin reading.
+BANK_SIGNATURES = [
+    ('kotak', re.compile(rb'(?m)^[^\n]*Sl\. No\.,Transaction Date')),
+    ('kvb', re.compile(rb'(?m)^[^\n]*Transaction Date,Value Date,Branch,Cheque No\.')),
+    ('equitas', re.compile(rb'(?m)^(?=[^\n]*Narration)(?=[^\n]*Date)')),
+    ('axis', re.compile(rb'(?m)^[ \t]*\d{2}/\d{2}/\d{4}[ \t]+[^\n]*?[\d,]+\.\d{2}[ \t]+(?:Dr|Cr)\b')),
+]
+
+def detect_bank(input_file):
+    """
+    Identify a statement's bank from its first few KB.
+    Returns (bank, byte offset of the header line), or (None, None).
+    """
+    with open(input_file, 'rb') as file:
+        head = file.read(SNIFF_BYTES)
+    for bank, signature in BANK_SIGNATURES:
+        match = signature.search(head)
+        if match:
+            return bank, match.start()
+    return None, None
+
+def _skip_to_header(file, header):
+    """
+    Advance the file just past the line containing the header.
+    Returns the number of lines read, header included, or 0 if the header
+    is never found.
+    """
+    for count, line in enumerate(file, 1):
+        if header in line:
+            return count
+    return 0
+
+def _row_text(row):
+    """
+    Return a parsed CSV row as CSV text again, for error reports
+    """
+    text = StringIO()
+    csv.writer(text, lineterminator='').writerow(row)
+    return text.getvalue()
+
+# Statements are read with errors='surrogateescape', which turns bytes that
+# are not UTF-8 into these lone surrogates instead of failing the whole file
+_UNDECODABLE = re.compile('[\udc80-\udcff]')
+
+def _undecodable(row):
+    """
+    Return whether a CSV row contains bytes that are not UTF-8
+    """
+    return not all(map(str.isascii, row)) and any(_UNDECODABLE.search(field) for field in row)
+
+def _line_number_at(input_file, offset):
+    """
+    Return the 1-based number of the line starting at a byte offset of a file
+    """
+    if not offset:
+        return 1
+    with open(input_file, 'rb') as file:
+        return file.read(offset).count(b'\n') + 1
+
+@register_parser('kotak', streaming=True)
+def iter_kotak_statement(input_file, header_offset=None):
+    """
+    Stream transactions from a Kotak Mahindra Bank statement CSV file one at a time
+    """
+    timer = ParserTimer('kotak', input_file)
+    try:
+        with open(input_file, 'r', encoding='utf-8', errors='surrogateescape', newline='') as file:
+            # Find the line where transaction details start, jumping straight
+            # to it when format detection already located it
+            with timer.stage('header_search'):
+                if header_offset:
+                    file.seek(header_offset)
+                found = _skip_to_header(file, KOTAK_HEADER)
+            if not found:
+                print("Error: Could not find transaction details header in the statement")
+                return
+            timer.header = (input_file, header_offset, found - 1)
+
+            # Process transaction rows with one reader from the header onwards
+            reader = csv.reader(file)
+            for row in reader:
+                timer.counts['rows'] += 1
+                # Skip empty lines and rows that are not transactions
+                if len(row) < 8 or not re.match(r'\d+', row[0]):
+                    timer.counts['skipped'] += 1
+                    continue
+                if _undecodable(row):
+                    timer.error(timer.header_line() + reader.line_num, 'encoding', 'not valid UTF-8', _row_text(row))
+                    continue
+
+                try:
+                    # Extract transaction data
+                    sl_no = row[0]
+                    trans_date = row[1]
+                    value_date = row[2]
+                    description = row[3]
+                    ref_no = ''    #row[4]
+                    amount = row[5].replace(',', '') if row[5] else '0'
+                    dr_cr = row[6]
+                    balance = row[7]
+                    date_part = trans_date.split()[0] if ' ' in trans_date else trans_date
+                    category, subcategory = timer.classify(description)
+
+                    trans = Transaction(
+                        transaction_date=timer.normalize_date(date_part, '%d-%m-%Y'),  # Convert to DD/MM/YYYY
+                        description=description,
+                        ref_no=ref_no,
+                        amount=float(amount),
+                        type='Expense' if dr_cr == 'DR' else 'Income',
+                        category=category,
+                        subcategory=subcategory,
+                        account='Kotak'  # Default account name
+                    )
+                except Exception as e:
+                    timer.error(timer.header_line() + reader.line_num, type(e).__name__, str(e), _row_text(row))
+                    continue
+
+                timer.accept(trans.category)
+                timer.pause()
+                yield trans
+                timer.resume()
+    finally:
+        timer.finish()
+
+@register_parser('kotak')
+def parse_kotak_statement(input_file, header_offset=None):
+    """
+    Parse Kotak Mahindra Bank statement CSV file and extract transaction data
+    """
+    return TransactionBatch(iter_kotak_statement(input_file, header_offset))
+
+@register_parser('kvb', streaming=True)
+def iter_kvb_statement(input_file, header_offset=None):
+    """
+    Stream transactions from a KVB Bank statement CSV file one at a time
+    """
+    print(f"Reading KVB statement from {input_file}")
+    timer = ParserTimer('kvb', input_file)
+    try:
+        with open(input_file, 'r', encoding='utf-8', errors='surrogateescape', newline='') as file:
+            # Find the line where transaction details start, jumping straight
+            # to it when format detection already located it
+            with timer.stage('header_search'):
+                if header_offset:
+                    file.seek(header_offset)
+                found = _skip_to_header(file, KVB_HEADER)
+            if not found:
+                print("Error: Could not find transaction details header in the statement")
+                return
+            timer.header = (input_file, header_offset, found - 1)
+
+            # Process transaction rows with one reader from the header onwards
+            reader = csv.reader(file)
+            for row in reader:
+                timer.counts['rows'] += 1
+                # Skip empty lines and rows that are not transactions
+                if len(row) < 8:
+                    timer.counts['skipped'] += 1
+                    continue
+                if _undecodable(row):
+                    timer.error(timer.header_line() + reader.line_num, 'encoding', 'not valid UTF-8', _row_text(row))
+                    continue
+
+                try:
+                    # Extract transaction data
+                    trans_date = row[0]
+                    value_date = row[1]
+                    description = "" #row[4]
+                    debit = row[5].replace(',', '') if row[5] else '0'
+                    credit = row[6].replace(',', '') if row[6] else '0'
+                    balance = row[7].replace(',', '')
+
+                    # Determine transaction type and amount
+                    if float(debit) > 0:
+                        amount = float(debit)
+                        trans_type = 'Expense'
+                    else:
+                        amount = float(credit)
+                        trans_type = 'Income'
 
-def parse_equitas_statement(input_file):
+                    category, subcategory = timer.classify(description)
+
+                    trans = Transaction(
+                        transaction_date=timer.normalize_date(trans_date, '%d-%m-%Y %H:%M:%S'),
+                        description=description,
+                        ref_no="", #row[3],
+                        amount=amount,
+                        type=trans_type,
+                        category=category,
+                        subcategory=subcategory,
+                        account='KVB'  # Default account name
+                    )
+                except Exception as e:
+                    timer.error(timer.header_line() + reader.line_num, type(e).__name__, str(e), _row_text(row))
+                    continue
+
+                timer.accept(trans.category)
+                timer.pause()
+                yield trans
+                timer.resume()
+    finally:
+        timer.finish()
+
+@register_parser('kvb')
+def parse_kvb_statement(input_file, header_offset=None):
+    """
+    Parse KVB Bank statement CSV file and extract transaction data
+    """
+    return TransactionBatch(iter_kvb_statement(input_file, header_offset))
+
+@register_parser('equitas')
+def parse_equitas_statement(input_file, header_offset=None):
     """
     Parse Equitas Small Finance Bank statement CSV file and extract transaction data
     """
-    # Read entire file content
-    with open(input_file, 'r', encoding='utf-8') as file:
-        content = file.read()
-    
+    timer = ParserTimer('equitas', input_file)
+    try:
+        return _parse_equitas_statement(input_file, header_offset, timer)
+    finally:
+        timer.finish()
+
+def _parse_equitas_statement(input_file, header_offset, timer):
+    # pandas is only needed for Equitas, so it is imported here rather than
+    # slowing down every other conversion
+    import numpy as np
+    import pandas as pd
+
+    # Read the file content, from the header onwards if detection located it
+    with timer.stage('read'):
+        with open(input_file, 'r', encoding='utf-8', errors='surrogateescape') as file:
+            if header_offset:
+                file.seek(header_offset)
+            content = file.read()
+
     # Find the line where transaction details start (look for "Narration" to identify header)
-    transaction_start = -1
-    lines = content.split('\n')
-    for i, line in enumerate(lines):
-        if 'Narration' in line and 'Date' in line:
-            transaction_start = i
-            break
-    
+    with timer.stage('header_search'):
+        transaction_start = -1
+        lines = content.split('\n')
+        for i, line in enumerate(lines):
+            if 'Narration' in line and 'Date' in line:
+                transaction_start = i
+                break
+
     if transaction_start == -1:
         print("Error: Could not find transaction details header in the statement")
         return None
-    
-    # Create a list to store transaction data
-    transactions = []
-    
+
+    # Columnar container for the transaction data
+    transactions = TransactionBatch()
+
     # Use pandas to read from the header line onwards to handle complex CSV properly
-    from io import StringIO
     csv_content = '\n'.join(lines[transaction_start:])
-    
+
+    # pandas cannot hold bytes that are not UTF-8, so it gets them as
+    # replacement characters and their rows are rejected below
+    pandas_content = csv_content
+    if not csv_content.isascii() and _UNDECODABLE.search(csv_content):
+        pandas_content = _UNDECODABLE.sub('\ufffd', csv_content)
+
     try:
-        df = pd.read_csv(StringIO(csv_content), skipinitialspace=True)
-        
-        # Clean up column names (remove extra whitespace and newlines)
-        df.columns = df.columns.str.replace('\n', ' ').str.strip()
-        
-        # Process each row
-        for idx, row in df.iterrows():
-            try:
-                # Skip rows with NaN dates or empty dates
-                if pd.isna(row.get('Date')) or row.get('Date') == '*** End of the Statement ***':
-                    continue
-                
-                trans_date_str = str(row.get('Date', '')).strip()
-                if not trans_date_str or trans_date_str.startswith('***'):
-                    continue
-                
-                # Parse the date
-                trans_date = datetime.strptime(trans_date_str, '%d-%b-%Y').strftime('%d/%m/%Y')
-                
-                # Extract fields
-                narration = str(row.get('Narration', '')).strip()
-                ref_no = str(row.get('Reference No. / Cheque No.', '')).strip()
-                
-                # Handle withdrawal and deposit columns (which may have newlines in header)
-                withdrawal_val = str(row.get('Withdrawal\nINR', row.get('Withdrawal INR', ''))).strip()
-                deposit_val = str(row.get('Deposit\nINR', row.get('Deposit INR', ''))).strip()
-                
-                # Clean currency values
-                withdrawal = float(withdrawal_val.replace(',', '')) if withdrawal_val and withdrawal_val != 'nan' else 0.0
-                deposit = float(deposit_val.replace(',', '')) if deposit_val and deposit_val != 'nan' else 0.0
-                
-                # Determine transaction type and amount
-                if withdrawal > 0:
-                    amount = withdrawal
-                    trans_type = 'Expense'
-                elif deposit > 0:
-                    amount = deposit
-                    trans_type = 'Income'
-                else:
-                    continue
-                
-                category = categorize_transaction(narration)
-                subcategory = get_subcategory(category, narration)
-                
-                transactions.append({
-                    'transaction_date': trans_date,
-                    'description': narration,
-                    'ref_no': ref_no,
-                    'amount': amount,
-                    'type': trans_type,
-                    'category': category,
-                    'subcategory': subcategory,
-                    'account': 'Equitas'
-                })
-            except Exception as e:
-                print(f"Error processing row {idx}: {e}")
-                continue
+        df = pd.read_csv(StringIO(pandas_content), skipinitialspace=True)
     except Exception as e:
         print(f"Error reading CSV: {e}")
         return None
-    
+
+    # Clean up column names (remove extra whitespace and newlines)
+    df.columns = df.columns.str.replace('\n', ' ').str.strip()
+    timer.counts['rows'] = len(df)
+    if 'Date' not in df.columns:
+        timer.counts['skipped'] = len(df)
+        return transactions
+
+    # Skip rows with empty dates and the end-of-statement marker
+    dates = _text_column(df, 'Date').str.strip()
+    df = df[df['Date'].notna() & (dates != '') & ~dates.str.startswith('***')]
+    dates = dates[df.index]
+
+    undecodable = pd.Series(False, index=df.index)
+    if pandas_content is not csv_content:
+        for column in df.columns:
+            undecodable |= df[column].astype(str).str.contains('\ufffd', regex=False)
+    rejected = [(idx, 'encoding', 'not valid UTF-8') for idx in df.index[undecodable]]
+
+    # Parse the dates for the whole column at once
+    with timer.stage('dates'):
+        parsed_dates = pd.to_datetime(dates, format='%d-%b-%Y', errors='coerce')
+    bad_dates = parsed_dates.isna() & ~undecodable
+    rejected += [(idx, 'invalid_date', f"invalid date '{dates[idx]}'") for idx in df.index[bad_dates]]
+
+    # Handle withdrawal and deposit columns (the header newlines were cleaned above)
+    withdrawal, bad_withdrawal = _amount_column(df, 'Withdrawal INR')
+    deposit, bad_deposit = _amount_column(df, 'Deposit INR')
+    rejected += [(idx, 'invalid_amount', 'invalid amount')
+                 for idx in df.index[~undecodable & ~bad_dates & (bad_withdrawal | bad_deposit)]]
+
+    if rejected:
+        # Recover the line number and text of the rejected rows; pandas
+        # numbers rows from the header and skips blank lines
+        header_line = _line_number_at(input_file, header_offset) + transaction_start
+        reader = csv.reader(StringIO(csv_content))
+        next(reader)
+        records = [(reader.line_num, row) for row in reader if row]
+        for idx, error, reason in rejected:
+            line, row = records[idx]
+            timer.error(header_line + line - 1, error, reason, _row_text(row))
+
+    # Keep rows that parsed and moved money, and derive type/amount
+    keep = (~undecodable & ~bad_dates & ~bad_withdrawal & ~bad_deposit & ((withdrawal > 0) | (deposit > 0))).to_numpy()
+    is_expense = (withdrawal > 0).to_numpy()[keep]
+    amounts = np.where(is_expense, withdrawal.to_numpy()[keep], deposit.to_numpy()[keep])
+
+    narration_column = _text_column(df, 'Narration')[keep].str.strip()
+    ref_nos = _text_column(df, 'Reference No. / Cheque No.')[keep].str.strip().tolist()
+
+    # Format each distinct date only once
+    with timer.stage('dates'):
+        date_codes, unique_dates = pd.factorize(parsed_dates[keep])
+        unique_dates = unique_dates.strftime(TARGET_DATE_FORMAT).tolist()
+
+    # Categorize each distinct narration only once
+    with timer.stage('categorize'):
+        narration_codes, unique_narrations = pd.factorize(narration_column)
+        labels = [classify_description(narration) for narration in unique_narrations]
+    unknown = np.array([category == 'unknown' for category, _ in labels], dtype=bool)
+    timer.counts['unknown_category'] = int(unknown[narration_codes].sum()) if len(labels) else 0
+
+    # Fill the batch columns directly instead of adding row by row
+    transactions.extend_columns(
+        (date_codes, unique_dates), narration_column.tolist(), ref_nos, amounts,
+        (is_expense.astype(np.intp), ['Income', 'Expense']),
+        (narration_codes, [category for category, _ in labels]),
+        (narration_codes, [subcategory for _, subcategory in labels]),
+        (np.zeros(len(amounts), dtype=np.intp), ['Equitas']))
+
+    timer.counts['transactions'] = len(transactions)
+    timer.counts['skipped'] = timer.counts['rows'] - timer.counts['transactions'] - timer.counts['errors']
     return transactions
 
-def parse_axis_statement(input_file):
+def _text_column(df, column):
     """
-    Parse Axis Bank statement text file and extract transaction data
+    Return a column as strings the way str() renders each cell ('nan' for
+    missing values), or empty strings if the column is absent
     """
-    with open(input_file, 'r', encoding='utf-8') as file:
-        lines = file.readlines()
+    import pandas as pd
 
-    transactions = []
-    # Regex to capture date, description, and amounts with Dr/Cr identifiers
-    # It handles cases with one or two amounts on the same line.
-    pattern = re.compile(r"(\d{2}/\d{2}/\d{4})\s+(.*?)\s+([\d,]+\.\d{2})\s+(Dr|Cr)(?:\s+([\d,]+\.\d{2})\s+(Dr|Cr))?")
+    if column not in df.columns:
+        return pd.Series('', index=df.index, dtype=object)
+    return df[column].astype(object).map(str)
 
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
+def _amount_column(df, column):
+    """
+    Convert a currency column to floats, treating blanks as 0.
+    Returns the amounts and a mask of values that could not be converted.
+    """
+    import pandas as pd
 
-        match = pattern.search(line)
-        if match:
-            date_str, description, amount1_str, type1, amount2_str, type2 = match.groups()
-            
-            # Clean up description
-            description = description.strip()
-
-            # First amount
-            amount1 = float(amount1_str.replace(',', ''))
-            if amount1 > 0:
-                category1 = categorize_transaction(description)
-                subcategory1 = get_subcategory(category1, description)
-                transactions.append({
-                    'transaction_date': datetime.strptime(date_str, '%d/%m/%Y').strftime('%d/%m/%Y'),
-                    'description': description,
-                    'ref_no': '',
-                    'amount': amount1,
-                    'type': 'Expense' if type1 == 'Dr' else 'Income',
-                    'category': category1,
-                    'subcategory': subcategory1,
-                    'account': 'Axis Credit Card'
-                })
-
-            # Second amount, if it exists
-            if amount2_str:
-                amount2 = float(amount2_str.replace(',', ''))
-                if amount2 > 0:
-                    # For cashback, the description is often related to the primary transaction
-                    desc2 = "Cashback for " + description if type2 == 'Cr' else description
-                    category2 = categorize_transaction(desc2)
-                    subcategory2 = get_subcategory(category2, desc2)
-                    transactions.append({
-                        'transaction_date': datetime.strptime(date_str, '%d/%m/%Y').strftime('%d/%m/%Y'),
-                        'description': desc2,
-                        'ref_no': '',
-                        'amount': amount2,
-                        'type': 'Expense' if type2 == 'Dr' else 'Income',
-                        'category': category2,
-                        'subcategory': subcategory2,
-                        'account': 'Axis Credit Card'
-                    })
-        else:
-            print(f"Warning: Could not parse line: {line}")
+    text = _text_column(df, column).str.strip().str.replace(',', '', regex=False)
+    blank = (text == '') | (text == 'nan')
+    amounts = pd.to_numeric(text.where(~blank, '0'), errors='coerce')
+    return amounts.fillna(0.0).astype(float), amounts.isna()
+
+# Regex to capture date, description, and amounts with Dr/Cr identifiers.
+# It handles cases with one or two amounts on the same line. Whitespace never
+# crosses a newline and each match consumes its whole line, so scanning the
+# whole file at once finds the same first match per line as a per-line search.
+AXIS_LINE_PATTERN = re.compile(
+    rb"(?m)^[^\n]*?(\d{2}/\d{2}/\d{4})[^\S\n]+([^\n]*?)[^\S\n]+([\d,]+\.\d{2})[^\S\n]+(Dr|Cr)"
+    rb"(?:[^\S\n]+([\d,]+\.\d{2})[^\S\n]+(Dr|Cr))?[^\n]*")
+_NON_BLANK_LINE = re.compile(rb"(?m)^[^\S\n]*(\S[^\n]*?)[^\S\n]*$")
+
+@register_parser('axis')
+def parse_axis_statement(input_file, header_offset=None):
+    """
+    Parse Axis Bank statement text file and extract transaction data
+    """
+    timer = ParserTimer('axis', input_file)
+    transactions = TransactionBatch()
+    try:
+        with open(input_file, 'rb') as file:
+            with timer.stage('read'):
+                # Memory-map the file so the scan below runs over it in one pass
+                size = os.fstat(file.fileno()).st_size
+                buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+            try:
+                _scan_axis_buffer(buffer, header_offset or 0, transactions, timer)
+            finally:
+                if size:
+                    buffer.close()
+    finally:
+        timer.finish()
 
     return transactions
 
-def categorize_transaction(description):
+def _scan_axis_buffer(buffer, start, transactions, timer):
+    position = start
+    line = buffer[:start].count(b'\n') + 1
+    for match in AXIS_LINE_PATTERN.finditer(buffer, start):
+        # Lines between two transactions are headers, footers and other noise
+        line = _skip_unparsed_lines(buffer, position, match.start(), line, timer)
+        position = match.end()
+        timer.counts['rows'] += 1
+        try:
+            _add_axis_transactions(match, transactions, timer)
+        except ValueError as e:
+            # Invalid dates and text that is not UTF-8
+            error, reason = ('encoding', 'not valid UTF-8') if isinstance(e, UnicodeDecodeError) else (
+                type(e).__name__, str(e))
+            timer.error(line, error, reason, match.group(0).decode('utf-8', errors='surrogateescape').strip())
+
+    _skip_unparsed_lines(buffer, position, len(buffer), line, timer)
+
+def _add_axis_transactions(match, transactions, timer):
     """
-    Basic automatic categorization based on description keywords
+    Add the one or two transactions on a matched statement line
     """
-    description = description.lower()
-    
-    # Define category mapping based on keywords
-    categories = {
-        'Food': ['restaurant', 'food', 'swiggy', 'zomato', 'cafe', 'dine', 'food out', 'water', 'juice', 'hotel', 'milk', 'NEIGHBOURHOOD V', 'grocery', 'snack', 'breakfast', 'lunch', 'dinner', 'tea', 'coffee', 'ice cream', 'bakery', 'dhaba', 'thindi', 'tiffin', 'coconut', 'veggie','Groceries'],
-        'Transportation': ['uber', 'ola', 'cab', 'taxi', 'auto', 'petrol', 'fuel', 'railways', 'irctc', 'train', 'fuels', 'rail', 'emission test', 'number plate', 'parking', 'metro', 'bus', 'bmtc', 'zoomcar', 'car rental'],
-        'Culture': ['movie', 'netflix', 'prime', 'hotstar', 'subscription', 'entertainment', 'theatre', 'concert', 'show', 'cinema', 'shetty cinemas', 'badminton', 'sports', 'gaming'],
-        'Household': ['bill', 'electricity', 'phone', 'mobile', 'recharge', 'dth', 'broadband', 'internet', 'wifi', 'maintenance', 'repair', 'rent', 'cleaning', 'appliance', 'furniture'],
-        'Health': ['medical', 'hospital', 'doctor', 'pharmacy', 'medicine', 'health', 'clinic', 'consultation', 'test', 'optical', 'lenskart', 'specs', 'apollo'],
-        'Education': ['course', 'college', 'school', 'fees', 'tuition', 'education', 'books', 'stationery', 'class', 'study'],
-        'Investment': ['investment', 'mutual fund', 'stocks', 'shares', 'sip', 'trading', 'deposit', 'zerodha'],
-        'Apparel': ['clothes', 'clothing', 'fashion', 'dress', 'shirt', 'pants', 'shoes', 'wardrobe', 'accessories'],
-        'Beauty': ['salon', 'haircut', 'spa', 'cosmetics', 'grooming', 'beauty'],
-        'Services': ['broker', 'agent', 'service', 'consultation', 'professional', 'fees'],
-        'Rent': ['rent', 'house rent', 'room rent', 'deposit'],
-        'Social Life': ['party', 'hangout', 'friends', 'club', 'social', 'gathering', 'treat', 'meet', 'couple meet', 'date'],
-        'Shopping': ['amazon', 'flipkart', 'online shopping', 'retail', 'mart', 'store', 'bazaar'],
-        'Digital': ['aws', 'cloud', 'subscription', 'digital', 'online service', 'jio', 'airtel', 'phone bill'],
-        'Donation': ['donation', 'charity', 'trust', 'temple', 'religious'],
-        'Interests': ['premat'],
-        'Gift': ['gift', 'present', 'gifts', 'birthday', 'anniversary', 'celebration', 'rakhi', 'festival'],
-        'Interests': ['int.pd', 'interest', 'int paid', 'int. paid', 'int credited', 'interest credited']
-    }
-    
-    # Try to match description with categories
-    for category, keywords in categories.items():
-        for keyword in keywords:
-            if keyword in description:
-    
-                return category
-    
-    # Default category if no match found
-    return 'unknown'
+    date_str, description, amount1_str, type1, amount2_str, type2 = (
+        group.decode('utf-8') if group is not None else None for group in match.groups())
 
-def get_subcategory(category, description):
+    # Clean up description
+    description = description.strip()
+
+    # First amount
+    amount1 = float(amount1_str.replace(',', ''))
+    if amount1 > 0:
+        trans_date = timer.normalize_date(date_str, '%d/%m/%Y')
+        category1, subcategory1 = timer.classify(description)
+        timer.accept(category1)
+        transactions.add(
+            transaction_date=trans_date,
+            description=description,
+            ref_no='',
+            amount=amount1,
+            type='Expense' if type1 == 'Dr' else 'Income',
+            category=category1,
+            subcategory=subcategory1,
+            account='Axis Credit Card'
+        )
+
+    # Second amount, if it exists
+    if amount2_str:
+        amount2 = float(amount2_str.replace(',', ''))
+        if amount2 > 0:
+            # For cashback, the description is often related to the primary transaction
+            desc2 = "Cashback for " + description if type2 == 'Cr' else description
+            trans_date = timer.normalize_date(date_str, '%d/%m/%Y')
+            category2, subcategory2 = timer.classify(desc2)
+            timer.accept(category2)
+            transactions.add(
+                transaction_date=trans_date,
+                description=desc2,
+                ref_no='',
+                amount=amount2,
+                type='Expense' if type2 == 'Dr' else 'Income',
+                category=category2,
+                subcategory=subcategory2,
+                account='Axis Credit Card'
+            )
+
+def _skip_unparsed_lines(buffer, start, end, line, timer):
     """
-    Returns a subcategory for a given category and description using keyword matching.
+    Count the non-blank lines in buffer[start:end] as skipped, keeping the
+    first few as samples, given the number of the line at start. Returns the
+    number of the line at end.
     """
-    description = description.lower()
-    subcategories = {
-        'Household': [
-            ('Maid', ['maid', 'house help', 'cleaning']),
-            ('Furniture', ['furniture', 'sofa', 'table', 'chair', 'bed', 'shelf', 'cabinet']),
-            ('Kitchen', ['kitchen', 'utensil', 'cooker', 'mixer', 'plates', 'cups']),
-            ('Phone Bill', ['phone', 'mobile', 'recharge', 'postpaid', 'prepaid']),
-            ('Other Essentials', ['essential', 'grocery', 'daily', 'toiletries']),
-            ('Appliances', ['appliance', 'fridge', 'ac', 'microwave', 'washing machine', 'fan', 'cooler']),
-            ('Internet', ['internet', 'broadband', 'wifi', 'data', 'connection']),
-            ('DTH', ['dth', 'set top', 'cable', 'television']),
-            ('Mom hyd', ['mom hyd']),
-            ('Ironing', ['iron', 'press', 'laundry']),
-            ('Maintenance', ['maintenance', 'repair', 'fix', 'service']),
-            ('Cook', ['cook', 'chef', 'cooking']),
-            ('Toiletries', ['toiletries', 'soap', 'shampoo', 'toothpaste', 'personal care']),
-            ('Painting', ['paint', 'painting', 'wall', 'decor']),
-            ('Electricity', ['electricity', 'power', 'electric', 'current']),
-            ('Packers and movers', ['packers', 'movers', 'moving', 'relocation', 'shifting']),
-            ('Home Loan', ['home loan', 'loan', 'emi', 'mortgage']),
-            ('Rent', ['rent', 'deposit', 'advance', 'lease'])
-        ],
-        'Food': [
-            ('Vegis/Groceries', ['grocery', 'Groceries','vegetable', 'vegi', 'groceries', 'fruit', 'milk', 'water', 'provisions', 'mart', 'store']),
-            ('Eating out', ['restaurant', 'swiggy', 'zomato', 'cafe', 'dine', 'hotel', 'food out', 'eating out', 'takeaway']),
-            ('Beverages', ['beverage', 'juice', 'coffee', 'tea', 'drink', 'beverages', 'soda', 'soft drink']),
-            ('Snack', ['snack', 'chips', 'namkeen', 'biscuit', 'cookie', 'bakery']),
-            ('Lunch', ['lunch', 'afternoon meal', 'tiffin']),
-            ('Dinner', ['dinner', 'night meal', 'supper']),
-            ('Breakfast', ['breakfast', 'morning meal', 'toast']),
-            ('Food Delivery', ['delivery', 'online order', 'swiggy', 'zomato']),
-            ('Street Food', ['street food', 'chaat', 'roadside', 'vendor'])
-        ],
-        'Transportation': [
-            ('Taxi', ['uber', 'ola', 'taxi', 'cab', 'ride', 'hire']),
-            ('Subway/Train', ['train', 'subway', 'metro', 'rail', 'irctc', 'railway']),
-            ('Bike', ['bike', 'cycle', 'bicycle', 'fuel', 'petrol', 'diesel']),
-            ('Parcel/Courier', ['parcel', 'courier', 'delivery', 'shipping', 'post']),
-            ('Car', ['car', 'drive', 'parking', 'toll', 'fastag']),
-            ('Flight', ['flight', 'air', 'airport', 'airline', 'plane']),
-            ('Bus', ['bus', 'transport', 'ST', 'roadways']),
-            ('Vehicle Service', ['service', 'repair', 'maintenance', 'emission test', 'number plate']),
-            ('Fine', ['fine', 'penalty', 'challan', 'ticket'])
-        ],
-        'Beauty': [
-            ('Salon', ['salon', 'haircut', 'spa', 'massage', 'parlor', 'unisex']),
-            ('Cosmetics', ['cosmetics', 'makeup', 'beauty products', 'skincare']),
-            ('Personal Care', ['personal care', 'grooming', 'hygiene']),
-            ('Beauty Services', ['facial', 'waxing', 'threading', 'manicure', 'pedicure']),
-            ('Optical', ['lenskart', 'specs', 'glasses', 'contact lens', 'eye care'])
-        ],
-        'Services': [
-            ('Professional', ['professional', 'consultant', 'advisor', 'expert']),
-            ('Broker', ['broker', 'agent', 'dealer', 'intermediary']),
-            ('Legal', ['legal', 'lawyer', 'advocate', 'notary']),
-            ('Documentation', ['document', 'certificate', 'attestation']),
-            ('Home Services', ['repair', 'plumber', 'electrician', 'carpenter'])
-        ],
-        'Investment': [
-            ('Trading', ['zerodha', 'trading', 'stocks', 'shares']),
-            ('Mutual Funds', ['mutual fund', 'sip', 'investment']),
-            ('Fixed Deposits', ['fd', 'fixed deposit', 'deposit']),
-            ('Other Investments', ['gold', 'bonds', 'crypto'])
-        ],
-        'Digital': [
-            ('Cloud Services', ['aws', 'cloud', 'server', 'hosting']),
-            ('Subscriptions', ['subscription', 'netflix', 'prime', 'hotstar']),
-            ('Mobile Services', ['jio', 'airtel', 'vodafone', 'phone bill']),
-            ('Apps', ['app purchase', 'playstore', 'appstore'])
-        ],
-        'Rent': [
-            ('House Rent', ['house rent', 'home rent', 'flat rent']),
-            ('Deposit', ['deposit', 'advance', 'security']),
-            ('Maintenance', ['maintenance', 'society', 'association']),
-            ('Utilities', ['utility', 'electricity', 'water', 'gas'])
-        ],
-        'Beauty': [
-            ('Beauty', ['beauty', 'salon', 'spa']),
-            ('Cosmetics', ['cosmetic', 'makeup', 'lipstick']),
-            ('Haircut', ['haircut', 'hair']),
-            ('Accessories', ['accessory', 'jewellery', 'earring', 'ring'])
-        ],
-        'Culture': [
-            ('Music', ['music', 'spotify', 'itunes']),
-            ('Sports', ['sport', 'cricket', 'football', 'badminton']),
-            ('Apps', ['app', 'application', 'software']),
-            ('Gaming', ['game', 'gaming']),
-            ('OTT', ['netflix', 'prime', 'hotstar', 'ott', 'subscription']),
-            ('Books', ['book', 'novel']),
-            ('Movie', ['movie', 'cinema']),
-            ('Dance/Club', ['dance', 'club']),
-            ('Gym', ['gym', 'fitness']),
-            ('Yoga', ['yoga']),
-            ('Crafting', ['craft', 'crafting'])
-        ],
-        'Health': [
-            ('Insurance', ['insurance']),
-            ('Medicine', ['medicine', 'pharmacy', 'tablet', 'medic']),
-            ('Health Tests', ['test', 'diagnostic', 'lab', 'scan']),
-            ('Hospital', ['hospital', 'clinic']),
-            ('Health', ['health', 'doctor', 'checkup']),
-            ('Baby Food', ['baby food', 'infant']),
-            ('Specs', ['specs', 'spectacles', 'glasses'])
-        ],
-        'Social Life': [
-            ('Hangout', ['hangout', 'meet']),
-            ('Party', ['party']),
-            ('Fun', ['fun', 'outing']),
-            ('Friend', ['friend'])
-        ],
-        'Trip': [
-            ('Food', ['food', 'meal', 'lunch', 'dinner']),
-            ('Misc', ['misc', 'other']),
-            ('Transportation', ['taxi', 'train', 'flight', 'bus', 'car', 'transport']),
-            ('Stay/Hotel', ['stay', 'hotel']),
-            ('Tickets', ['ticket', 'tickets'])
-        ],
-        'Apparel': [
-            ('Clothing', ['clothes', 'clothing', 'shirt', 'pant', 'dress', 'kurta', 'jeans', 'tshirt', 'saree']),
-            ('Shoes', ['shoe', 'shoes', 'sandal']),
-            ('Specs', ['specs', 'spectacles', 'glasses']),
-            ('Fashion', ['fashion', 'style']),
-            ('Laundry', ['laundry', 'wash']),
-            ('Watch', ['watch'])
-        ],
-        'Tax': [
-            ('PT', ['pt']),
-            ('TDS', ['tds']),
-            ('Tax', ['tax'])
-        ],
-        'Services': [
-            ('House broker', ['broker', 'agent']),
-            ('Taxation', ['taxation']),
-            ('Passport', ['passport']),
-            ('Cleaning', ['clean', 'cleaning'])
-        ],
-        'Event': [
-            ('Stay', ['stay', 'hotel']),
-            ('Food', ['food', 'meal']),
-            ('Decorations', ['decor', 'decoration'])
-        ],
-        'Education': [
-            ('Schooling', ['school', 'schooling'])
-        ],
-        'Marriage': [
-            ('transport', ['transport', 'taxi', 'car', 'bus']),
-            ('footwear', ['footwear', 'shoe', 'sandal']),
-            ('clothes', ['clothes', 'clothing', 'dress']),
-            ('gifts', ['gift', 'present']),
-            ('photographer', ['photo', 'photographer']),
-            ('food', ['food', 'meal']),
-            ('stay', ['stay', 'hotel']),
-            ('publicity', ['publicity']),
-            ('beauty', ['beauty', 'salon']),
-            ('invitation cards', ['invitation', 'card'])
-        ]
-    }
+    skipped = 0
+    for match in _NON_BLANK_LINE.finditer(buffer, start, end):
+        skipped += 1
+        if _quarantine.wants_skipped():
+            _quarantine.skip(timer.source, line + buffer[start:match.start()].count(b'\n'),
+                             match.group(1).decode('utf-8', errors='surrogateescape'))
+    timer.counts['rows'] += skipped
+    timer.counts['skipped'] += skipped
+    return line + buffer[start:end].count(b'\n')
+
+# Category mapping based on keywords. Categories are tried in order and the
+# first one with a keyword found in the description wins. Keywords match
+# anywhere in the description, ignoring case, except short abbreviations
+# written in capitals (such as 'ST'), which only match as whole words.
+ABBREVIATION_MAX_LENGTH = 3
+
+CATEGORY_KEYWORDS = {
+    'Food': ['restaurant', 'food', 'swiggy', 'zomato', 'cafe', 'dine', 'food out', 'water', 'juice', 'hotel', 'milk', 'NEIGHBOURHOOD V', 'grocery', 'snack', 'breakfast', 'lunch', 'dinner', 'tea', 'coffee', 'ice cream', 'bakery', 'dhaba', 'thindi', 'tiffin', 'coconut', 'veggie','Groceries'],
+    'Transportation': ['uber', 'ola', 'cab', 'taxi', 'auto', 'petrol', 'fuel', 'railways', 'irctc', 'train', 'fuels', 'rail', 'emission test', 'number plate', 'parking', 'metro', 'bus', 'bmtc', 'zoomcar', 'car rental'],
+    'Culture': ['movie', 'netflix', 'prime', 'hotstar', 'subscription', 'entertainment', 'theatre', 'concert', 'show', 'cinema', 'shetty cinemas', 'badminton', 'sports', 'gaming'],
+    'Household': ['bill', 'electricity', 'phone', 'mobile', 'recharge', 'dth', 'broadband', 'internet', 'wifi', 'maintenance', 'repair', 'rent', 'cleaning', 'appliance', 'furniture'],
+    'Health': ['medical', 'hospital', 'doctor', 'pharmacy', 'medicine', 'health', 'clinic', 'consultation', 'test', 'optical', 'lenskart', 'specs', 'apollo'],
+    'Education': ['course', 'college', 'school', 'fees', 'tuition', 'education', 'books', 'stationery', 'class', 'study'],
+    'Investment': ['investment', 'mutual fund', 'stocks', 'shares', 'sip', 'trading', 'deposit', 'zerodha'],
+    'Apparel': ['clothes', 'clothing', 'fashion', 'dress', 'shirt', 'pants', 'shoes', 'wardrobe', 'accessories'],
+    'Beauty': ['salon', 'haircut', 'spa', 'cosmetics', 'grooming', 'beauty'],
+    'Services': ['broker', 'agent', 'service', 'consultation', 'professional', 'fees'],
+    'Rent': ['rent', 'house rent', 'room rent', 'deposit'],
+    'Social Life': ['party', 'hangout', 'friends', 'club', 'social', 'gathering', 'treat', 'meet', 'couple meet', 'date'],
+    'Shopping': ['amazon', 'flipkart', 'online shopping', 'retail', 'mart', 'store', 'bazaar'],
+    'Digital': ['aws', 'cloud', 'subscription', 'digital', 'online service', 'jio', 'airtel', 'phone bill'],
+    'Donation': ['donation', 'charity', 'trust', 'temple', 'religious'],
+    'Interests': ['premat'],
+    'Gift': ['gift', 'present', 'gifts', 'birthday', 'anniversary', 'celebration', 'rakhi', 'festival'],
+    'Interests': ['int.pd', 'interest', 'int paid', 'int. paid', 'int credited', 'interest credited']
+}
+
+# Subcategory mapping per category, tried in order like the categories above.
+SUBCATEGORY_KEYWORDS = {
+    'Household': [
+        ('Maid', ['maid', 'house help', 'cleaning']),
+        ('Furniture', ['furniture', 'sofa', 'table', 'chair', 'bed', 'shelf', 'cabinet']),
+        ('Kitchen', ['kitchen', 'utensil', 'cooker', 'mixer', 'plates', 'cups']),
+        ('Phone Bill', ['phone', 'mobile', 'recharge', 'postpaid', 'prepaid']),
+        ('Other Essentials', ['essential', 'grocery', 'daily', 'toiletries']),
+        ('Appliances', ['appliance', 'fridge', 'ac', 'microwave', 'washing machine', 'fan', 'cooler']),
+        ('Internet', ['internet', 'broadband', 'wifi', 'data', 'connection']),
+        ('DTH', ['dth', 'set top', 'cable', 'television']),
+        ('Mom hyd', ['mom hyd']),
+        ('Ironing', ['iron', 'press', 'laundry']),
+        ('Maintenance', ['maintenance', 'repair', 'fix', 'service']),
+        ('Cook', ['cook', 'chef', 'cooking']),
+        ('Toiletries', ['toiletries', 'soap', 'shampoo', 'toothpaste', 'personal care']),
+        ('Painting', ['paint', 'painting', 'wall', 'decor']),
+        ('Electricity', ['electricity', 'power', 'electric', 'current']),
+        ('Packers and movers', ['packers', 'movers', 'moving', 'relocation', 'shifting']),
+        ('Home Loan', ['home loan', 'loan', 'emi', 'mortgage']),
+        ('Rent', ['rent', 'deposit', 'advance', 'lease'])
+    ],
+    'Food': [
+        ('Vegis/Groceries', ['grocery', 'Groceries','vegetable', 'vegi', 'groceries', 'fruit', 'milk', 'water', 'provisions', 'mart', 'store']),
+        ('Eating out', ['restaurant', 'swiggy', 'zomato', 'cafe', 'dine', 'hotel', 'food out', 'eating out', 'takeaway']),
+        ('Beverages', ['beverage', 'juice', 'coffee', 'tea', 'drink', 'beverages', 'soda', 'soft drink']),
+        ('Snack', ['snack', 'chips', 'namkeen', 'biscuit', 'cookie', 'bakery']),
+        ('Lunch', ['lunch', 'afternoon meal', 'tiffin']),
+        ('Dinner', ['dinner', 'night meal', 'supper']),
+        ('Breakfast', ['breakfast', 'morning meal', 'toast']),
+        ('Food Delivery', ['delivery', 'online order', 'swiggy', 'zomato']),
+        ('Street Food', ['street food', 'chaat', 'roadside', 'vendor'])
+    ],
+    'Transportation': [
+        ('Taxi', ['uber', 'ola', 'taxi', 'cab', 'ride', 'hire']),
+        ('Subway/Train', ['train', 'subway', 'metro', 'rail', 'irctc', 'railway']),
+        ('Bike', ['bike', 'cycle', 'bicycle', 'fuel', 'petrol', 'diesel']),
+        ('Parcel/Courier', ['parcel', 'courier', 'delivery', 'shipping', 'post']),
+        ('Car', ['car', 'drive', 'parking', 'toll', 'fastag']),
+        ('Flight', ['flight', 'air', 'airport', 'airline', 'plane']),
+        ('Bus', ['bus', 'transport', 'ST', 'roadways']),
+        ('Vehicle Service', ['service', 'repair', 'maintenance', 'emission test', 'number plate']),
+        ('Fine', ['fine', 'penalty', 'challan', 'ticket'])
+    ],
+    'Beauty': [
+        ('Salon', ['salon', 'haircut', 'spa', 'massage', 'parlor', 'unisex']),
+        ('Cosmetics', ['cosmetics', 'makeup', 'beauty products', 'skincare']),
+        ('Personal Care', ['personal care', 'grooming', 'hygiene']),
+        ('Beauty Services', ['facial', 'waxing', 'threading', 'manicure', 'pedicure']),
+        ('Optical', ['lenskart', 'specs', 'glasses', 'contact lens', 'eye care'])
+    ],
+    'Services': [
+        ('Professional', ['professional', 'consultant', 'advisor', 'expert']),
+        ('Broker', ['broker', 'agent', 'dealer', 'intermediary']),
+        ('Legal', ['legal', 'lawyer', 'advocate', 'notary']),
+        ('Documentation', ['document', 'certificate', 'attestation']),
+        ('Home Services', ['repair', 'plumber', 'electrician', 'carpenter'])
+    ],
+    'Investment': [
+        ('Trading', ['zerodha', 'trading', 'stocks', 'shares']),
+        ('Mutual Funds', ['mutual fund', 'sip', 'investment']),
+        ('Fixed Deposits', ['fd', 'fixed deposit', 'deposit']),
+        ('Other Investments', ['gold', 'bonds', 'crypto'])
+    ],
+    'Digital': [
+        ('Cloud Services', ['aws', 'cloud', 'server', 'hosting']),
+        ('Subscriptions', ['subscription', 'netflix', 'prime', 'hotstar']),
+        ('Mobile Services', ['jio', 'airtel', 'vodafone', 'phone bill']),
+        ('Apps', ['app purchase', 'playstore', 'appstore'])
+    ],
+    'Rent': [
+        ('House Rent', ['house rent', 'home rent', 'flat rent']),
+        ('Deposit', ['deposit', 'advance', 'security']),
+        ('Maintenance', ['maintenance', 'society', 'association']),
+        ('Utilities', ['utility', 'electricity', 'water', 'gas'])
+    ],
+    'Beauty': [
+        ('Beauty', ['beauty', 'salon', 'spa']),
+        ('Cosmetics', ['cosmetic', 'makeup', 'lipstick']),
+        ('Haircut', ['haircut', 'hair']),
+        ('Accessories', ['accessory', 'jewellery', 'earring', 'ring'])
+    ],
+    'Culture': [
+        ('Music', ['music', 'spotify', 'itunes']),
+        ('Sports', ['sport', 'cricket', 'football', 'badminton']),
+        ('Apps', ['app', 'application', 'software']),
+        ('Gaming', ['game', 'gaming']),
+        ('OTT', ['netflix', 'prime', 'hotstar', 'ott', 'subscription']),
+        ('Books', ['book', 'novel']),
+        ('Movie', ['movie', 'cinema']),
+        ('Dance/Club', ['dance', 'club']),
+        ('Gym', ['gym', 'fitness']),
+        ('Yoga', ['yoga']),
+        ('Crafting', ['craft', 'crafting'])
+    ],
+    'Health': [
+        ('Insurance', ['insurance']),
+        ('Medicine', ['medicine', 'pharmacy', 'tablet', 'medic']),
+        ('Health Tests', ['test', 'diagnostic', 'lab', 'scan']),
+        ('Hospital', ['hospital', 'clinic']),
+        ('Health', ['health', 'doctor', 'checkup']),
+        ('Baby Food', ['baby food', 'infant']),
+        ('Specs', ['specs', 'spectacles', 'glasses'])
+    ],
+    'Social Life': [
+        ('Hangout', ['hangout', 'meet']),
+        ('Party', ['party']),
+        ('Fun', ['fun', 'outing']),
+        ('Friend', ['friend'])
+    ],
+    'Trip': [
+        ('Food', ['food', 'meal', 'lunch', 'dinner']),
+        ('Misc', ['misc', 'other']),
+        ('Transportation', ['taxi', 'train', 'flight', 'bus', 'car', 'transport']),
+        ('Stay/Hotel', ['stay', 'hotel']),
+        ('Tickets', ['ticket', 'tickets'])
+    ],
+    'Apparel': [
+        ('Clothing', ['clothes', 'clothing', 'shirt', 'pant', 'dress', 'kurta', 'jeans', 'tshirt', 'saree']),
+        ('Shoes', ['shoe', 'shoes', 'sandal']),
+        ('Specs', ['specs', 'spectacles', 'glasses']),
+        ('Fashion', ['fashion', 'style']),
+        ('Laundry', ['laundry', 'wash']),
+        ('Watch', ['watch'])
+    ],
+    'Tax': [
+        ('PT', ['pt']),
+        ('TDS', ['tds']),
+        ('Tax', ['tax'])
+    ],
+    'Services': [
+        ('House broker', ['broker', 'agent']),
+        ('Taxation', ['taxation']),
+        ('Passport', ['passport']),
+        ('Cleaning', ['clean', 'cleaning'])
+    ],
+    'Event': [
+        ('Stay', ['stay', 'hotel']),
+        ('Food', ['food', 'meal']),
+        ('Decorations', ['decor', 'decoration'])
+    ],
+    'Education': [
+        ('Schooling', ['school', 'schooling'])
+    ],
+    'Marriage': [
+        ('transport', ['transport', 'taxi', 'car', 'bus']),
+        ('footwear', ['footwear', 'shoe', 'sandal']),
+        ('clothes', ['clothes', 'clothing', 'dress']),
+        ('gifts', ['gift', 'present']),
+        ('photographer', ['photo', 'photographer']),
+        ('food', ['food', 'meal']),
+        ('stay', ['stay', 'hotel']),
+        ('publicity', ['publicity']),
+        ('beauty', ['beauty', 'salon']),
+        ('invitation cards', ['invitation', 'card'])
+    ]
+}
 
-    if category in subcategories:
-        #print(f"Finding subcategory for category: {category}")
-        for subcat, keywords in subcategories[category]:
-            #print(f"Checking subcategory: {subcat} with keywords: {keywords}")
+def _trie_regex(keywords):
+    """
+    Build a regex alternation factored by common prefixes, preferring the
+    longest keyword at each position. Also returns, for every keyword, the
+    keywords that are prefixes of it (itself included), read off its trie path.
+    """
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = keyword
+
+    prefixes = {}
+    for keyword in keywords:
+        node = trie
+        found = []
+        for char in keyword:
+            node = node[char]
+            if '' in node:
+                found.append(node[''])
+        prefixes[keyword] = tuple(found)
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if '' in node:
+            return '(?:' + body + ')?'
+        return body
+
+    return build(trie), prefixes
+
+def _is_abbreviation(keyword):
+    return keyword.isupper() and len(keyword) <= ABBREVIATION_MAX_LENGTH
+
+def _compile_keyword_matcher(categories, subcategories):
+    """
+    Compile the keyword tables into a single regex (plus one for whole-word
+    abbreviations, if any) and rank lookups so a description is scanned once
+    for both category and subcategory
+    """
+    words = set()
+    substrings = set()
+    for keyword in itertools.chain.from_iterable(categories.values()):
+        (words if _is_abbreviation(keyword) else substrings).add(keyword.lower())
+    for entries in subcategories.values():
+        for _, keywords in entries:
+            for keyword in keywords:
+                (words if _is_abbreviation(keyword) else substrings).add(keyword.lower())
+
+    category_names = list(categories)
+    category_ranks = {}
+    for rank, category in enumerate(category_names):
+        for keyword in categories[category]:
+            category_ranks.setdefault(keyword.lower(), rank)
+
+    subcategory_names = {}
+    subcategory_ranks = {}
+    for category, entries in subcategories.items():
+        subcategory_names[category] = [subcat for subcat, _ in entries]
+        ranks = subcategory_ranks[category] = {}
+        for rank, (_, keywords) in enumerate(entries):
             for keyword in keywords:
-                #print(f"Checking keyword: {keyword} in description: {description}")
-                if keyword in description:
-                    #print(f"Matched subcategory: {subcat}")
-                    return subcat
-    return ''
+                ranks.setdefault(keyword.lower(), rank)
+
+    # A keyword that also matches anywhere elsewhere in the tables is matched anywhere
+    words -= substrings
+    word_pattern = re.compile(r'\b(?:' + '|'.join(map(re.escape, sorted(words))) + r')\b') if words else None
+
+    # Every keyword that matches at a given position is a prefix of the
+    # longest one matching there, so a greedy trie regex finding the longest
+    # keyword at each position and expanding it to its keyword prefixes finds
+    # every keyword present.
+    regex, prefixes = _trie_regex(substrings)
+    pattern = re.compile('(?=(' + regex + '))')
+
+    return pattern, prefixes, word_pattern, category_names, category_ranks, subcategory_names, subcategory_ranks
+
+(_KEYWORD_PATTERN, _KEYWORD_PREFIXES, _WORD_PATTERN, _CATEGORY_NAMES, _CATEGORY_RANKS,
+ _SUBCATEGORY_NAMES, _SUBCATEGORY_RANKS) = _compile_keyword_matcher(CATEGORY_KEYWORDS, SUBCATEGORY_KEYWORDS)
 
-def create_realbyte_import_file(transactions, output_file):
+def _find_keywords(description):
     """
-    Create RealByte Money Manager import file in TSV format
+    Return the set of all known keywords occurring in the description
     """
-    # Ensure the output file is unique
-    if os.path.exists(output_file):
-        base, ext = os.path.splitext(output_file)
-        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-        output_file = f"{base}_{timestamp}{ext}"
+    description = description.lower()
+    found = set()
+    for match in _KEYWORD_PATTERN.finditer(description):
+        found.update(_KEYWORD_PREFIXES[match.group(1)])
+    if _WORD_PATTERN is not None:
+        found.update(_WORD_PATTERN.findall(description))
+    return found
 
-    # Define header as per RealByte format
-    headers = ['Date', 'Account', 'Category', 'Subcategory', 'Note', 'Amount', 'Income/Expense', 'Description']
-
-    # Create DataFrame for easier handling
-    df = pd.DataFrame(columns=headers)
-
-    # Add transaction data
-    for trans in transactions:
-        df = df._append({
-            'Date': trans['transaction_date'],
-            'Account': trans['account'],  # Default account name
-            'Category': trans['category'],
-            'Subcategory': trans['subcategory'],  # Leave empty for now
-            'Note': trans['ref_no'],
-            'Amount': abs(trans['amount']),  # Absolute amount
-            'Income/Expense': trans['type'],
-            'Description': trans['description']
-        }, ignore_index=True)
-
-    # Write to TSV file
-    df.to_csv(output_file, index=False, sep='\t')
-    print(f"Successfully converted and saved to {output_file}")
+def _match_category(found):
+    ranks = [_CATEGORY_RANKS[k] for k in found if k in _CATEGORY_RANKS]
+    return _CATEGORY_NAMES[min(ranks)] if ranks else 'unknown'
 
-def main():
-    if len(sys.argv) < 4:
-        print("Usage: python csv_to_realbyte.py <input_file> <output_file> <bank>")
-        return
-    
-    input_file = sys.argv[1]
-    output_file = sys.argv[2]
-    bank = sys.argv[3]
+def _match_subcategory(category, found):
+    if category not in _SUBCATEGORY_RANKS:
+        return ''
+    category_ranks = _SUBCATEGORY_RANKS[category]
+    ranks = [category_ranks[k] for k in found if k in category_ranks]
+    return _SUBCATEGORY_NAMES[category][min(ranks)] if ranks else ''
 
-    print(f"Processing {input_file} for bank: {bank}")
-    
-    transactions = None
-    # Process the statement
-    if bank == 'kotak':
-        transactions = parse_kotak_statement(input_file)
-    elif bank == 'kvb':
-        transactions = parse_kvb_statement(input_file)
-    elif bank == 'axis':
-        transactions = parse_axis_statement(input_file)
-    elif bank == 'equitas':
-        transactions = parse_equitas_statement(input_file)
-    
-    if transactions:
-        create_realbyte_import_file(transactions, output_file)
-    else:
-        print("No transactions found or error in processing the statement")
+def _classify_uncached(description):
+    found = _find_keywords(description)
+    category = _match_category(found)
+    return category, _match_subcategory(category, found)
+
+def _rules_hash():
+    """
+    Fingerprint of the keyword tables, used to invalidate cached categories
+    whenever the rules change
+    """
+    rules = json.dumps([CATEGORY_KEYWORDS, SUBCATEGORY_KEYWORDS, ABBREVIATION_MAX_LENGTH])
+    return hashlib.sha256(rules.encode('utf-8')).hexdigest()[:16]
+
+RULES_HASH = _rules_hash()
+
+DEFAULT_CACHE_DIR = os.environ.get('MMSCRIPT_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'mmscript'))
+CATEGORY_CACHE_FILE = 'categories.sqlite'
+
+class CategoryCache:
+    """
+    Bounded LRU cache of description -> (category, subcategory), optionally
+    backed by a SQLite file so results carry over between runs. Stored rows
+    are keyed by RULES_HASH, so editing the keyword tables invalidates them.
+    """
+
+    def __init__(self, path=None, maxsize=100000):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.pending = {}
+        self.hits = 0
+        self.misses = 0
+        self.loaded = 0
+        self.connection = None
+        self.fully_loaded = True
+        if path:
+            self._open(path)
+
+    def _open(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS categories ('
+            'rules_hash TEXT, description TEXT, category TEXT, subcategory TEXT, '
+            'PRIMARY KEY (rules_hash, description))')
+        # Entries computed with older rule tables can never be hit again
+        self.connection.execute('DELETE FROM categories WHERE rules_hash != ?', (RULES_HASH,))
+        self.connection.commit()
+
+        # Load the stored entries in one query instead of a lookup per miss
+        rows = self.connection.execute(
+            'SELECT description, category, subcategory FROM categories WHERE rules_hash = ? LIMIT ?',
+            (RULES_HASH, self.maxsize))
+        for description, category, subcategory in rows:
+            self.entries[description] = (category, subcategory)
+        self.loaded = len(self.entries)
+        self.fully_loaded = self.loaded < self.maxsize
+
+    def lookup(self, description):
+        """
+        Return (category, subcategory) for a description, computing and
+        remembering it on a miss
+        """
+        # Matching is case-insensitive, so the lowercased text is the key
+        key = description.lower()
+        result = self.entries.get(key)
+        if result is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+        if not self.fully_loaded:
+            result = self.connection.execute(
+                'SELECT category, subcategory FROM categories WHERE rules_hash = ? AND description = ?',
+                (RULES_HASH, key)).fetchone()
+
+        if result is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            result = _classify_uncached(key)
+            if self.connection is not None:
+                self.pending[key] = result
+                if len(self.pending) >= 10000:
+                    self.flush()
+
+        self.entries[key] = result
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+        return result
+
+    def flush(self):
+        """
+        Write newly computed entries to the SQLite store
+        """
+        if self.connection is None or not self.pending:
+            return
+        self.connection.executemany(
+            'INSERT OR REPLACE INTO categories VALUES (?, ?, ?, ?)',
+            [(RULES_HASH, key, category, subcategory) for key, (category, subcategory) in self.pending.items()])
+        self.connection.commit()
+        self.pending.clear()
+
+    def close(self):
+        self.flush()
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def stats(self):
+        return {'lookups': self.hits + self.misses, 'hits': self.hits, 'misses': self.misses, 'loaded': self.loaded}
+
+_category_cache = CategoryCache()
+
+def open_category_cache(cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Switch categorization to a cache persisted under cache_dir (memory only if
+    cache_dir is None) and return it
+    """
+    global _category_cache
+    _category_cache.close()
+    path = os.path.join(cache_dir, CATEGORY_CACHE_FILE) if cache_dir else None
+    _category_cache = CategoryCache(path)
+    return _category_cache
+
+def format_cache_stats(stats):
+    lookups = stats['lookups']
+    hit_rate = stats['hits'] / lookups if lookups else 0.0
+    summary = f"Category cache: {lookups} lookups, {stats['hits']} hits ({hit_rate:.1%}), {stats['misses']} computed"
+    if 'loaded' in stats:
+        summary += f", {stats['loaded']} entries loaded from disk"
+    return summary
+
+def classify_description(description):
+    """
+    Return (category, subcategory) for a description in a single scan
+    """
+    return _category_cache.lookup(description)
+
+def categorize_transaction(description):
+    """
+    Basic automatic categorization based on description keywords
+    """
+    return classify_description(description)[0]
+
+def get_subcategory(category, description):
+    """
+    Returns a subcategory for a given category and description using keyword matching.
+    """
+    return _match_subcategory(category, _find_keywords(description))
+
+REALBYTE_HEADERS = ['Date', 'Account', 'Category', 'Subcategory', 'Note', 'Amount', 'Income/Expense', 'Description']
+
+# Descriptions are compared by which hashed character trigrams they contain,
+# weighted by how rare each trigram is among the trained descriptions so that
+# shared boilerplate such as 'upi/' counts for little. Case is folded and every
+# run of digits becomes a single '0', so UPI merchant and reference numbers
+# neither keep apart otherwise identical descriptions nor make unrelated ones
+# look alike. Only the trigram buckets each description contains are stored,
+# and descriptions are scored through the lists of past descriptions sharing
+# each bucket, not as descriptions times buckets matrices. The few buckets
+# that most descriptions share are scored as MODEL_DENSE_BUCKETS dense columns
+# by a matrix product instead.
+MODEL_VERSION = 3
+MODEL_DIMENSIONS = 1 << 11
+MODEL_TEXT_BYTES = 64
+MODEL_BATCH_SIZE = 1024
+# Bounds the scratch arrays used to score a batch of descriptions, in elements
+MODEL_SCORE_BUDGET = 1 << 22
+MODEL_DENSE_BUCKETS = 64
+MODEL_MIN_SIMILARITY = 0.5
+_DIGIT_RUN = re.compile(rb'[0-9]+')
+
+def _fold_description(description):
+    """
+    Return the lowercased UTF-8 bytes of a description with every run of digits made '0'
+    """
+    return _DIGIT_RUN.sub(b'0', description.lower().encode('utf-8'))
+
+def _ngram_buckets(texts, dimensions):
+    """
+    Return the hashed trigram sets of folded descriptions in CSR form, as
+    (indptr, indices): the sorted buckets of texts[i] are
+    indices[indptr[i]:indptr[i + 1]]. Texts are hashed MODEL_BATCH_SIZE at a time.
+    """
+    import numpy as np
+
+    index_type = np.min_scalar_type(dimensions - 1)
+    indptr = [np.zeros(1, dtype=np.int64)]
+    indices = [np.zeros(0, dtype=index_type)]
+    for start in range(0, len(texts), MODEL_BATCH_SIZE):
+        batch = texts[start:start + MODEL_BATCH_SIZE]
+        # Fixed-width byte rows, truncated and zero padded to MODEL_TEXT_BYTES
+        chars = np.array(batch, dtype=f'S{MODEL_TEXT_BYTES}')
+        chars = chars.view(np.uint8).reshape(len(batch), MODEL_TEXT_BYTES).astype(np.uint64)
+        trigrams = (chars[:, :-2] << 16) | (chars[:, 1:-1] << 8) | chars[:, 2:]
+        # Multiplicative hashing; the top bits pick the bucket
+        buckets = ((trigrams * 0x9E3779B1) & 0xFFFFFFFF) >> (32 - (dimensions - 1).bit_length())
+        present = chars[:, 2:] != 0
+
+        # Sorting (row, bucket) keys drops repeated trigrams and orders the rows
+        rows = np.broadcast_to(np.arange(len(batch), dtype=np.uint64)[:, None], buckets.shape)[present]
+        keys = np.unique(rows * dimensions + buckets[present])
+        indices.append((keys % dimensions).astype(index_type))
+        counts = np.bincount((keys // dimensions).astype(np.intp), minlength=len(batch))
+        indptr.append(indptr[-1][-1] + np.cumsum(counts))
+    return np.concatenate(indptr), np.concatenate(indices)
+
+def _weigh_buckets(indptr, indices, weights):
+    """
+    Return the row of every stored bucket and its weight, by the trigram's
+    rarity, with every row L2-normalized
+    """
+    import numpy as np
+
+    rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    values = weights[indices]
+    norms = np.sqrt(np.bincount(rows, weights=values.astype(np.float64) ** 2, minlength=len(indptr) - 1))
+    return rows, (values / norms[rows]).astype(np.float32)
+
+class CategoryModel:
+    """
+    Nearest-neighbour categorizer learnt from previously exported RealByte
+    files. It only fills in transactions the keyword rules leave 'unknown',
+    with the category of the most similar past description, if that is at
+    least min_similarity (cosine) alike. The past descriptions are kept as
+    CSR trigram sets (indptr, indices) and indexed by trigram for scoring.
+    """
+
+    def __init__(self, indptr, indices, weights, labels, label_names, dimensions=MODEL_DIMENSIONS,
+                 min_similarity=MODEL_MIN_SIMILARITY):
+        import numpy as np
+
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self.labels = labels
+        self.label_names = label_names
+        self.dimensions = dimensions
+        self.min_similarity = min_similarity
+        self.predicted = 0
+        self.unmatched = 0
+
+        rows, values = _weigh_buckets(indptr, indices, weights)
+        # Weights of the most common buckets as dense columns
+        dense = np.argsort(-np.bincount(indices, minlength=dimensions), kind='stable')[:MODEL_DENSE_BUCKETS]
+        self.dense_columns = np.full(dimensions, -1, dtype=np.intp)
+        self.dense_columns[dense] = np.arange(len(dense))
+        columns = self.dense_columns[indices]
+        in_dense = columns >= 0
+        self.dense_vectors = np.zeros((len(dense), len(labels)), dtype=np.float32)
+        self.dense_vectors[columns[in_dense], rows[in_dense]] = values[in_dense]
+        # The past descriptions containing each of the other buckets, with their weights
+        sparse = indices[~in_dense]
+        order = np.argsort(sparse, kind='stable')
+        self.posting_rows = rows[~in_dense][order].astype(np.int32)
+        self.posting_values = values[~in_dense][order]
+        self.posting_ptr = np.concatenate([[0], np.cumsum(np.bincount(sparse, minlength=dimensions))])
+
+    @classmethod
+    def train(cls, paths, dimensions=MODEL_DIMENSIONS):
+        """
+        Learn from RealByte TSV files, keeping the most frequent category and
+        subcategory of every folded description that the rules or the user
+        categorized
+        """
+        import numpy as np
+
+        label_counts = {}  # folded description -> {(category, subcategory): count}
+        for path in paths:
+            with open(path, 'r', encoding='utf-8', newline='') as file:
+                reader = csv.reader(file, delimiter='\t')
+                if next(reader, None) != REALBYTE_HEADERS:
+                    print(f"Skipping {path}: not a RealByte import file")
+                    continue
+                for row in reader:
+                    if len(row) != len(REALBYTE_HEADERS) or row[2] in ('', 'unknown'):
+                        continue
+                    counts = label_counts.setdefault(_fold_description(row[7]), {})
+                    label = (row[2], row[3])
+                    counts[label] = counts.get(label, 0) + 1
+
+        label_names = []
+        label_ids = {}
+        texts = []
+        labels = []
+        for text, counts in label_counts.items():
+            label = max(counts, key=counts.get)
+            if label not in label_ids:
+                label_ids[label] = len(label_names)
+                label_names.append(label)
+            texts.append(text)
+            labels.append(label_ids[label])
+
+        indptr, indices = _ngram_buckets(texts, dimensions)
+        # Smoothed inverse document frequency of every trigram bucket
+        frequencies = np.bincount(indices, minlength=dimensions)
+        weights = (np.log((1 + len(texts)) / (1 + frequencies)) + 1).astype(np.float32)
+        return cls(indptr, indices, weights, np.array(labels, dtype=np.int32), label_names, dimensions)
+
+    def save(self, path):
+        import numpy as np
+
+        # Written through a file object so numpy does not add '.npz' to the name
+        with open(path, 'wb') as file:
+            np.savez_compressed(file, version=np.array(MODEL_VERSION), indptr=self.indptr, indices=self.indices,
+                                weights=self.weights, labels=self.labels,
+                                categories=np.array([category for category, _ in self.label_names], dtype=str),
+                                subcategories=np.array([subcategory for _, subcategory in self.label_names], dtype=str),
+                                dimensions=np.array(self.dimensions))
+
+    @classmethod
+    def load(cls, path, min_similarity=MODEL_MIN_SIMILARITY):
+        """
+        Load a saved model, or return None if it was saved by an older version
+        """
+        import numpy as np
+
+        with np.load(path) as data:
+            if 'version' not in data.files or int(data['version']) != MODEL_VERSION:
+                print(f"{path} was trained by an older version of this script; retrain it with --train-model")
+                return None
+            label_names = list(zip(data['categories'].tolist(), data['subcategories'].tolist()))
+            return cls(data['indptr'], data['indices'], data['weights'], data['labels'], label_names,
+                       int(data['dimensions']), min_similarity)
+
+    def predict(self, descriptions):
+        """
+        Return (category, subcategory) or None for each description
+        """
+        import numpy as np
+
+        folded = [_fold_description(description) for description in descriptions]
+        texts = dict.fromkeys(folded)
+        unique = list(texts) if len(self.labels) else []
+        indptr, indices = _ngram_buckets(unique, self.dimensions)
+        rows, values = _weigh_buckets(indptr, indices, self.weights)
+        starts = self.posting_ptr[indices]
+        lengths = self.posting_ptr[indices.astype(np.intp) + 1] - starts
+
+        # Score as many descriptions at once as fit in MODEL_SCORE_BUDGET,
+        # counting each one's postings and its row of scores
+        costs = np.cumsum(np.bincount(rows, weights=lengths, minlength=len(unique)) + len(self.labels))
+        start = 0
+        while start < len(unique):
+            done = costs[start - 1] if start else 0
+            stop = max(start + 1, int(np.searchsorted(costs, done + MODEL_SCORE_BUDGET, side='right')))
+            entries = slice(indptr[start], indptr[stop])
+            counts = lengths[entries]
+            # Positions of the postings of every bucket of the batch, back to back
+            offsets = np.cumsum(counts) - counts
+            positions = np.arange(counts.sum()) - np.repeat(offsets - starts[entries], counts)
+            keys = np.repeat((rows[entries] - start) * len(self.labels), counts) + self.posting_rows[positions]
+            similarities = np.bincount(keys, weights=np.repeat(values[entries], counts) * self.posting_values[positions],
+                                       minlength=(stop - start) * len(self.labels)).reshape(stop - start, -1)
+            columns = self.dense_columns[indices[entries]]
+            in_dense = columns >= 0
+            queries = np.zeros((stop - start, len(self.dense_vectors)), dtype=np.float32)
+            queries[rows[entries][in_dense] - start, columns[in_dense]] = values[entries][in_dense]
+            similarities += queries @ self.dense_vectors
+            best = similarities.argmax(axis=1)
+            scores = similarities[np.arange(stop - start), best]
+            for text, neighbour, score in zip(unique[start:stop], best.tolist(), scores.tolist()):
+                if score >= self.min_similarity:
+                    texts[text] = self.label_names[self.labels[neighbour]]
+            start = stop
+        return [texts[text] for text in folded]
+
+    def categorize(self, transactions, batch_size=10000):
+        """
+        Yield the transactions, filling in the category of those the rules
+        could not categorize. Works through a stream batch_size rows at a time.
+        """
+        transactions = iter(transactions)
+        while True:
+            chunk = list(itertools.islice(transactions, batch_size))
+            if not chunk:
+                return
+            unknown = [trans for trans in chunk if trans.category == 'unknown']
+            with _stats.timer('model', 'predict', len(unknown)):
+                for trans, label in zip(unknown, self.predict([trans.description for trans in unknown])):
+                    if label is None:
+                        self.unmatched += 1
+                        continue
+                    trans.category, trans.subcategory = label
+                    self.predicted += 1
+            yield from chunk
+
+    def summary(self):
+        return f"Category model: {self.predicted} unknown transactions categorized, {self.unmatched} left unknown"
+
+def find_model_training_files(source):
+    """
+    Return the exported RealByte files to train on: source itself, or the
+    files in the source folder
+    """
+    if not os.path.isdir(source):
+        return [source]
+    return [os.path.join(source, name) for name in sorted(os.listdir(source))
+            if os.path.isfile(os.path.join(source, name))]
+
+def train_category_model(source, model_file):
+    """
+    Train a category model on the RealByte files in source and save it
+    """
+    start = time.perf_counter()
+    model = CategoryModel.train(find_model_training_files(source))
+    model.save(model_file)
+    _stats.add('model', 'train', time.perf_counter() - start, len(model.labels))
+    print(f"Saved category model with {len(model.labels)} descriptions "
+          f"and {len(model.label_names)} categories to {model_file}")
+    return model
+
+def _unique_output_file(output_file):
+    """
+    Return output_file, or a timestamped variant of it if it already exists
+    """
+    if os.path.exists(output_file):
+        base, ext = os.path.splitext(output_file)
+        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
+        output_file = f"{base}_{timestamp}{ext}"
+    return output_file
+
+def _realbyte_row(trans):
+    return [
+        trans.transaction_date,
+        trans.account,
+        trans.category,
+        trans.subcategory,
+        trans.ref_no,
+        abs(trans.amount),  # Absolute amount
+        trans.type,
+        trans.description
+    ]
+
+def create_realbyte_import_file(transactions, output_file, append=False):
+    """
+    Create RealByte Money Manager import file in TSV format.
+    With append, rows are added to the end of an existing file instead.
+    """
+    if not append:
+        output_file = _unique_output_file(output_file)
+    write_header = not append or not os.path.exists(output_file) or os.path.getsize(output_file) == 0
+
+    # Stream rows straight to the TSV file so memory stays flat. Only time
+    # spent writing is measured, not time spent pulling from a streaming parser.
+    start = time.perf_counter()
+    write_time = 0.0
+    rows = 0
+    try:
+        with open(output_file, 'a' if append else 'w', encoding='utf-8', newline='') as file:
+            writer = csv.writer(file, delimiter='\t', lineterminator=os.linesep)
+            if write_header:
+                writer.writerow(REALBYTE_HEADERS)
+            write_time += time.perf_counter() - start
+            for trans in transactions:
+                start = time.perf_counter()
+                writer.writerow(_realbyte_row(trans))
+                write_time += time.perf_counter() - start
+                rows += 1
+            start = time.perf_counter()
+    except BaseException:
+        # Never leave a half-written import file behind
+        if not append:
+            os.remove(output_file)
+        raise
+    write_time += time.perf_counter() - start
+    _stats.add('writer', 'write', write_time, rows)
+
+    if append:
+        print(f"Appended {rows} transactions to {output_file}")
+    else:
+        print(f"Successfully converted and saved to {output_file}")
+    return output_file
+
+SPLIT_CHOICES = ('account', 'month', 'account-month')
+MAX_OPEN_SHARDS = 32
+SHARD_BUFFER_BYTES = 1 << 16
+
+def write_sharded_import_files(transactions, output_file, split=None, max_rows=None, max_open_files=MAX_OPEN_SHARDS):
+    """
+    Stream transactions into several RealByte import files: one per account
+    and/or month (split), each cut into parts of at most max_rows rows.
+    At most max_open_files shards are open at once; the least recently used
+    is closed, and reopened for appending if more of its rows arrive.
+    A manifest listing every shard with its row count and date range is
+    written next to them. Returns the manifest entries.
+    """
+    base, ext = os.path.splitext(output_file)
+    current = {}            # shard key -> manifest entry being filled
+    shards = []             # manifest entries in creation order
+    date_ranges = {}        # shard file -> [first date key, last date key]
+    handles = OrderedDict()  # shard file -> (file, csv writer), least recently used first
+
+    def open_shard(path, mode):
+        while handles and len(handles) >= max_open_files:
+            handles.popitem(last=False)[1][0].close()
+        file = open(path, mode, encoding='utf-8', newline='', buffering=SHARD_BUFFER_BYTES)
+        writer = handles[path] = (file, csv.writer(file, delimiter='\t', lineterminator=os.linesep))
+        return writer
+
+    write_time = 0.0
+    rows = 0
+    try:
+        for trans in transactions:
+            start = time.perf_counter()
+            account = trans.account if split in ('account', 'account-month') else None
+            month = None
+            if split in ('month', 'account-month'):
+                date = trans.transaction_date
+                month = f"{date[6:10]}-{date[3:5]}"
+            key = (account, month)
+
+            shard = current.get(key)
+            if shard is None or (max_rows and shard['rows'] >= max_rows):
+                part = shard['part'] + 1 if shard else 1
+                if shard is not None and shard['file'] in handles:
+                    handles.pop(shard['file'])[0].close()
+                name = base
+                if account is not None:
+                    name += '_' + account.replace(' ', '_')
+                if month is not None:
+                    name += '_' + month
+                if max_rows:
+                    name += f'_part{part}'
+                shard = {'file': _unique_output_file(name + ext), 'account': account, 'month': month,
+                         'part': part, 'rows': 0, 'first_date': None, 'last_date': None}
+                # Only shards that were actually created are listed (and cleaned up)
+                open_shard(shard['file'], 'w')[1].writerow(REALBYTE_HEADERS)
+                current[key] = shard
+                shards.append(shard)
+
+            path = shard['file']
+            handle = handles.get(path)
+            if handle is None:
+                handle = open_shard(path, 'a')
+            else:
+                handles.move_to_end(path)
+            handle[1].writerow(_realbyte_row(trans))
+
+            shard['rows'] += 1
+            date_key = _date_sort_key(trans.transaction_date)
+            date_range = date_ranges.get(path)
+            if date_range is None:
+                date_ranges[path] = [date_key, date_key]
+                shard['first_date'] = shard['last_date'] = trans.transaction_date
+            elif date_key < date_range[0]:
+                date_range[0] = date_key
+                shard['first_date'] = trans.transaction_date
+            elif date_key > date_range[1]:
+                date_range[1] = date_key
+                shard['last_date'] = trans.transaction_date
+            rows += 1
+            write_time += time.perf_counter() - start
+    except BaseException:
+        # Never leave half-written import files behind
+        for file, _ in handles.values():
+            file.close()
+        for shard in shards:
+            try:
+                os.remove(shard['file'])
+            except FileNotFoundError:
+                pass
+        raise
+    start = time.perf_counter()
+    for file, _ in handles.values():
+        file.close()
+    write_time += time.perf_counter() - start
+    _stats.add('writer', 'write', write_time, rows)
+
+    if shards:
+        manifest_file = _unique_output_file(f"{base}_manifest.json")
+        with open(manifest_file, 'w', encoding='utf-8') as file:
+            json.dump({'shards': shards, 'rows': rows}, file, indent=2)
+        print(f"Successfully converted and saved {rows} transactions to {len(shards)} files, listed in {manifest_file}")
+    return shards
+
+class ImportLedger:
+    """
+    Persistent record of exported transactions, so overlapping statements only
+    export rows that are not already in Money Manager. All fingerprints are
+    loaded into a set on open, making each lookup O(1).
+    """
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS ledger ('
+            'fingerprint TEXT PRIMARY KEY, account TEXT, transaction_date TEXT, amount REAL, exported_at TEXT)')
+        self.seen = {row[0] for row in self.connection.execute('SELECT fingerprint FROM ledger')}
+        self.pending = []
+        self.new = 0
+        self.skipped = 0
+
+    @staticmethod
+    def fingerprints(transactions):
+        """
+        Yield (fingerprint, transaction) pairs for one statement. Identical
+        rows on the same day (two equal coffees) are told apart by their
+        occurrence number, which stays stable across overlapping downloads.
+        """
+        occurrences = {}
+        for trans in transactions:
+            key = '\x1f'.join([
+                trans.account,
+                trans.transaction_date,
+                f"{abs(trans.amount):.2f}",
+                trans.type,
+                trans.description,
+            ])
+            occurrence = occurrences.get(key, 0)
+            occurrences[key] = occurrence + 1
+            digest = hashlib.blake2b(f"{key}\x1f{occurrence}".encode('utf-8'), digest_size=16).hexdigest()
+            yield digest, trans
+
+    def filter_new(self, transactions):
+        """
+        Yield only the transactions of one statement that were not exported before
+        """
+        for fingerprint, trans in self.fingerprints(transactions):
+            if fingerprint in self.seen:
+                self.skipped += 1
+                continue
+            self.seen.add(fingerprint)
+            self.pending.append((fingerprint, trans.account, trans.transaction_date, abs(trans.amount)))
+            self.new += 1
+            yield trans
+
+    def commit(self):
+        """
+        Record the transactions passed through filter_new once they are written
+        """
+        exported_at = datetime.now().isoformat(timespec='seconds')
+        self.connection.executemany(
+            'INSERT OR IGNORE INTO ledger VALUES (?, ?, ?, ?, ?)',
+            [entry + (exported_at,) for entry in self.pending])
+        self.connection.commit()
+        self.pending.clear()
+
+    def close(self):
+        self.connection.close()
+
+    def summary(self):
+        return f"Ledger: {self.new} new transactions, {self.skipped} already exported"
+
+# Bump when a parser's output changes, so statements cached by the old parser are parsed again
+PARSE_CACHE_VERSION = 1
+PARSE_CACHE_DIR = 'statements'
+
+def _file_digest(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class ParseCache:
+    """
+    Parsed statements saved as Arrow IPC files, keyed by the bank and a hash
+    of the statement's contents, so an unchanged statement is only parsed
+    once. A cached statement is memory-mapped on load; if the keyword rules
+    changed since it was saved, it is recategorized from its descriptions.
+    """
+
+    def __init__(self, cache_dir):
+        self.directory = os.path.join(cache_dir, PARSE_CACHE_DIR)
+
+    def parse(self, input_file, bank, header_offset=None):
+        """
+        Return the statement's transactions from the cache, or parse and
+        cache them
+        """
+        path = os.path.join(self.directory, f"{bank}-{_file_digest(input_file)}-v{PARSE_CACHE_VERSION}.arrow")
+        if os.path.exists(path):
+            start = time.perf_counter()
+            try:
+                transactions = self._load(path)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Ignoring unreadable parse cache entry {path}: {e}")
+            else:
+                _stats.add('cache', 'load', time.perf_counter() - start, len(transactions))
+                _stats.count('cache', 'hits')
+                print(f"Loaded {len(transactions)} transactions for {input_file} from the parse cache")
+                return transactions
+
+        _stats.count('cache', 'misses')
+        transactions = get_parser(bank)(input_file, header_offset)
+        if transactions is not None:
+            with _stats.timer('cache', 'save', len(transactions)):
+                self._save(path, transactions)
+        return transactions
+
+    def _load(self, path):
+        import pyarrow as pa
+
+        with pa.memory_map(path) as source:
+            table = pa.ipc.open_file(source).read_all()
+            transactions = TransactionBatch.from_arrow(table)
+        if (table.schema.metadata or {}).get(b'rules_hash') != RULES_HASH.encode('ascii'):
+            with _stats.timer('cache', 'recategorize', len(transactions)):
+                transactions.recategorize()
+        return transactions
+
+    def _save(self, path, transactions):
+        import pyarrow as pa
+
+        os.makedirs(self.directory, exist_ok=True)
+        table = transactions.to_arrow().replace_schema_metadata({'rules_hash': RULES_HASH})
+        # Write to a temporary name first so readers never see half a file
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with pa.OSFile(temp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(temp_path, path)
+
+_parse_cache = None
+
+def open_parse_cache(cache_dir):
+    """
+    Cache parsed statements under cache_dir from now on (or stop caching if
+    cache_dir is None). Needs pyarrow; without it, statements are always parsed.
+    """
+    global _parse_cache
+    _parse_cache = None
+    if cache_dir is None:
+        return None
+    try:
+        import pyarrow
+    except ImportError:
+        print("pyarrow is not installed; statements will be parsed without the parse cache")
+        return None
+    _parse_cache = ParseCache(cache_dir)
+    return _parse_cache
+
+def parse_statement(input_file, bank, header_offset=None, streaming=False):
+    """
+    Parse a statement with its bank's parser, through the parse cache if one
+    is open. Cached statements are always returned as a TransactionBatch.
+    """
+    if _parse_cache is not None:
+        return _parse_cache.parse(input_file, bank, header_offset)
+    return get_parser(bank, streaming)(input_file, header_offset)
+
+STATEMENT_EXTENSIONS = ('.csv', '.txt')
+
+def _batch_job(path, bank):
+    """
+    Return the (input_file, bank, header_offset) job for a statement,
+    detecting the bank when it is 'auto', or None if it cannot be detected
+    """
+    if bank != 'auto':
+        return path, bank, None
+    bank, offset = detect_bank(path)
+    if bank is None:
+        print(f"Skipping {path}: could not detect the bank from the file contents")
+        return None
+    return path, bank, offset
+
+def _bank_from_name(name):
+    """
+    Return the bank named in a statement's file name, or 'auto'
+    """
+    return next((bank for bank in PARSERS if bank in name.lower()), 'auto')
+
+def find_batch_jobs(source):
+    """
+    Build the list of (input_file, bank, header_offset) jobs for a batch run.
+    A folder is scanned for statements, taking the bank from the file name
+    or else detecting it from the contents; any other path is read as a
+    manifest with one "<input_file>[,<bank>]" per line.
+    """
+    jobs = []
+    if os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            path = os.path.join(source, name)
+            if not os.path.isfile(path) or not name.lower().endswith(STATEMENT_EXTENSIONS):
+                continue
+            job = _batch_job(path, _bank_from_name(name))
+            if job is not None:
+                jobs.append(job)
+        return jobs
+
+    base_dir = os.path.dirname(os.path.abspath(source))
+    with open(source, 'r', encoding='utf-8') as file:
+        for line_no, line in enumerate(file, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            path, _, bank = line.rpartition(',') if ',' in line else (line, ',', 'auto')
+            path, bank = path.strip(), bank.strip().lower()
+            if not path or (bank not in PARSERS and bank != 'auto'):
+                print(f"Skipping manifest line {line_no}: expected '<input_file>[,<bank>]', got '{line}'")
+                continue
+            job = _batch_job(os.path.join(base_dir, path), bank)
+            if job is not None:
+                jobs.append(job)
+    return jobs
+
+def _init_batch_worker(cache_dir, parse_cache_dir=None, quarantine_file=None, max_errors=None):
+    open_category_cache(cache_dir)
+    open_parse_cache(parse_cache_dir)
+    open_quarantine(quarantine_file, max_errors)
+
+def _parse_batch_job(job):
+    """
+    Parse one statement in a worker process.
+    Returns the transactions, the category cache stats, the pipeline stats
+    and the quarantine counts for this job.
+    """
+    input_file, bank, header_offset = job
+    _stats.reset()
+    _quarantine.reset()
+    before = _category_cache.stats()
+    try:
+        transactions = parse_statement(input_file, bank, header_offset) or []
+    except TooManyErrors as e:
+        raise TooManyErrors(str(e), _quarantine.to_dict()) from None
+    _category_cache.flush()
+    after = _category_cache.stats()
+    cache_stats = {key: after[key] - before[key] for key in ('lookups', 'hits', 'misses')}
+    return transactions, cache_stats, _stats.to_dict(), _quarantine.to_dict()
+
+REPORT_FIELDS = ['Month', 'Account', 'Category', 'Subcategory', 'Income/Expense', 'Count', 'Amount']
+
+def rollup_transactions(transactions):
+    """
+    Return {(month, account, category, subcategory, type): [count, amount]}
+    totals of a batch, grouped in one vectorized pass over its code columns
+    """
+    import numpy as np
+
+    if not len(transactions):
+        return {}
+    values = transactions.values
+
+    # Month (YYYY-MM) number of every interned date, as a lookup table by date code
+    months = {}
+    month_numbers = np.zeros(len(values), dtype=np.int64)
+    for code in set(transactions.dates):
+        date = values[code]
+        month_numbers[code] = months.setdefault(f"{date[6:10]}-{date[3:5]}", len(months))
+    month_names = list(months)
+    columns = [month_numbers[np.frombuffer(transactions.dates, dtype=np.uint32)]]
+    columns += [np.frombuffer(codes, dtype=np.uint32)
+                for codes in (transactions.accounts, transactions.categories, transactions.subcategories,
+                              transactions.types)]
+
+    # Combine the columns into one group number. Each column is first
+    # renumbered to 0..k-1 over the values it actually uses, so the number
+    # stays small; only if it could still overflow is it renumbered by sorting.
+    groups = np.zeros(len(transactions), dtype=np.int64)
+    size = 1
+    for column in columns:
+        used = np.zeros(max(len(values), len(months)), dtype=bool)
+        used[column] = True
+        distinct = int(used.sum())
+        if size * distinct >= 1 << 62:
+            _, groups = np.unique(groups, return_inverse=True)
+            size = int(groups.max()) + 1
+        groups = groups * distinct + (np.cumsum(used) - 1)[column]
+        size *= distinct
+
+    # Count and sum per group with bincount, which needs no sort unless the
+    # group numbers are sparse
+    if size > 4 * len(groups):
+        _, groups = np.unique(groups, return_inverse=True)
+        size = int(groups.max()) + 1
+    counts = np.bincount(groups, minlength=size)
+    present = np.flatnonzero(counts)
+    amounts = np.bincount(groups, weights=np.abs(np.frombuffer(transactions.amounts, dtype=np.float64)),
+                          minlength=size)[present]
+    # All rows of a group have the same fields, so any one of them names it
+    rows = np.empty(size, dtype=np.int64)
+    rows[groups] = np.arange(len(groups))
+    rows, counts = rows[present], counts[present]
+
+    return {(month_names[columns[0][row]],) + tuple(values[column[row]] for column in columns[1:]): [count, amount]
+            for row, count, amount in zip(rows.tolist(), counts.tolist(), amounts.tolist())}
+
+def load_report(report_file):
+    """
+    Read the totals of a report written by save_report
+    """
+    with open(report_file, 'r', encoding='utf-8', newline='') as file:
+        if report_file.lower().endswith('.json'):
+            rows = json.load(file)
+        else:
+            rows = list(csv.DictReader(file, delimiter='\t'))
+    return {tuple(row[field] for field in REPORT_FIELDS[:5]): [int(row['Count']), float(row['Amount'])]
+            for row in rows}
+
+def save_report(report_file, totals):
+    """
+    Write report totals as JSON if report_file ends in .json, else as TSV
+    """
+    rows = [dict(zip(REPORT_FIELDS, key + (count, round(amount, 2))))
+            for key, (count, amount) in sorted(totals.items())]
+    with open(report_file, 'w', encoding='utf-8', newline='') as file:
+        if report_file.lower().endswith('.json'):
+            json.dump(rows, file, indent=1)
+        else:
+            writer = csv.DictWriter(file, REPORT_FIELDS, delimiter='\t', lineterminator=os.linesep)
+            writer.writeheader()
+            writer.writerows(rows)
+
+def update_report(report_file, transactions):
+    """
+    Add a batch of transactions to the monthly totals in report_file,
+    creating it if needed. Only the new transactions are aggregated; the
+    totals already in the file are added to, not recomputed.
+    """
+    with _stats.timer('report', 'rollup', len(transactions)):
+        totals = load_report(report_file) if os.path.exists(report_file) else {}
+        for key, (count, amount) in rollup_transactions(transactions).items():
+            entry = totals.setdefault(key, [0, 0.0])
+            entry[0] += count
+            entry[1] += amount
+        save_report(report_file, totals)
+    print(f"Added {len(transactions)} transactions to the monthly report {report_file}")
+
+TRANSFER_WINDOW_DAYS = 3
+
+def find_transfers(transactions, window_days=TRANSFER_WINDOW_DAYS):
+    """
+    Return (expense_index, income_index) pairs of a batch that look like one
+    transfer seen from both accounts: the same amount leaving one account and
+    arriving in another within window_days. Rows are sorted by amount and
+    date once, so each row is only compared with rows of the same amount
+    close to its date.
+    """
+    expense = transactions.codes.get('Expense')
+    income = transactions.codes.get('Income')
+    if expense is None or income is None:
+        return []
+
+    values = transactions.values
+    ordinals = {code: datetime.strptime(values[code], TARGET_DATE_FORMAT).toordinal()
+                for code in set(transactions.dates)}
+    days = [ordinals[code] for code in transactions.dates]
+    cents = [round(abs(amount) * 100) for amount in transactions.amounts]
+    types = transactions.types
+    accounts = transactions.accounts
+
+    pairs = []
+    # Unmatched rows of the current amount, oldest first, per type
+    pending = {expense: deque(), income: deque()}
+    current = None
+    for index in sorted(range(len(transactions)), key=lambda i: (cents[i], days[i])):
+        if cents[index] != current:
+            current = cents[index]
+            pending[expense].clear()
+            pending[income].clear()
+        trans_type = types[index]
+        if trans_type not in pending:
+            continue
+        other = pending[income if trans_type == expense else expense]
+        while other and days[other[0]] < days[index] - window_days:
+            other.popleft()
+        match = next((candidate for candidate in other if accounts[candidate] != accounts[index]), None)
+        if match is None:
+            pending[trans_type].append(index)
+            continue
+        other.remove(match)
+        pairs.append((index, match) if trans_type == expense else (match, index))
+    return pairs
+
+def reconcile_transfers(transactions, window_days=TRANSFER_WINDOW_DAYS, flag_only=False):
+    """
+    Stop transfers between converted accounts (e.g. a card bill paid from the
+    bank) from counting as both an expense and an income. Each matched pair
+    becomes one RealByte transfer row, 'Transfer-Out' from the paying account
+    with the receiving account as its category. With flag_only, both rows
+    are kept but categorized 'Transfer', with the other account as the
+    subcategory. Returns the number of pairs found.
+    """
+    with _stats.timer('transfers', 'match', len(transactions)):
+        pairs = find_transfers(transactions, window_days)
+
+    code = transactions._code
+    values = transactions.values
+    accounts = transactions.accounts
+    if flag_only:
+        for expense_index, income_index in pairs:
+            for index, other in ((expense_index, income_index), (income_index, expense_index)):
+                transactions.categories[index] = code('Transfer')
+                transactions.subcategories[index] = code(values[accounts[other]])
+    else:
+        for expense_index, income_index in pairs:
+            transactions.types[expense_index] = code('Transfer-Out')
+            transactions.categories[expense_index] = code(values[accounts[income_index]])
+            transactions.subcategories[expense_index] = code('')
+        incoming = {income_index for _, income_index in pairs}
+        if incoming:
+            transactions.reorder([index for index in range(len(transactions)) if index not in incoming])
+    _stats.count('transfers', 'pairs', len(pairs))
+    return len(pairs)
+
+def _account_output_file(output_file, account):
+    """
+    Return the per-account variant of an output file name
+    """
+    base, ext = os.path.splitext(output_file)
+    return f"{base}_{account.replace(' ', '_')}{ext}"
+
+def convert_batch(source, output_file, per_account=False, workers=None, cache_dir=DEFAULT_CACHE_DIR, ledger=None,
+                  model=None, parse_cache_dir=None, transfers='off', transfer_window=TRANSFER_WINDOW_DAYS,
+                  report_file=None, split=None, max_rows=None, max_open_files=MAX_OPEN_SHARDS):
+    """
+    Parse every statement listed by a folder or manifest on a process pool and
+    write the merged, date-sorted transactions to one file or one per account.
+    With a ledger, only transactions not exported before are written; with a
+    category model, it categorizes what the keyword rules could not.
+    transfers ('merge' or 'flag') reconciles transfers between the accounts,
+    and report_file gets the monthly totals of the written transactions.
+    split and max_rows shard the output as in write_sharded_import_files.
+    """
+    # Only batch runs need the process pool machinery
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    jobs = find_batch_jobs(source)
+    if not jobs:
+        print("No statements found for batch conversion")
+        return []
+
+    results = [[] for _ in jobs]
+    cache_stats = {'lookups': 0, 'hits': 0, 'misses': 0}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker,
+                             initargs=(cache_dir, parse_cache_dir, _quarantine.path, _quarantine.max_errors)) as pool:
+        futures = {pool.submit(_parse_batch_job, job): index for index, job in enumerate(jobs)}
+        for done, future in enumerate(as_completed(futures), 1):
+            index = futures[future]
+            input_file, bank, _ = jobs[index]
+            try:
+                results[index], job_stats, pipeline_stats, quarantined = future.result()
+            except Exception as e:
+                print(f"[{done}/{len(jobs)}] {input_file} ({bank}): failed: {e}")
+                if isinstance(e, TooManyErrors) and len(e.args) > 1:
+                    _quarantine.merge(e.args[1])
+                continue
+            print(f"[{done}/{len(jobs)}] {input_file} ({bank}): {len(results[index])} transactions")
+            for key, value in job_stats.items():
+                cache_stats[key] += value
+            _stats.merge(pipeline_stats)
+            _quarantine.merge(quarantined)
+    print(format_cache_stats(cache_stats))
+
+    # Merge in job order so the sort below is deterministic for equal dates.
+    # Fingerprints count occurrences per statement, so filter before merging.
+    transactions = TransactionBatch()
+    for result in results:
+        transactions.extend(ledger.filter_new(result) if ledger is not None else result)
+    if ledger is not None:
+        print(ledger.summary())
+
+    if not transactions and ledger is not None and ledger.skipped:
+        print("No new transactions (all already exported)")
+        return []
+    if not transactions:
+        print("No transactions found or error in processing the statements")
+        return []
+
+    if model is not None:
+        transactions = TransactionBatch(model.categorize(transactions))
+        print(model.summary())
+    if transfers != 'off':
+        pairs = reconcile_transfers(transactions, transfer_window, flag_only=transfers == 'flag')
+        print(f"Transfers: {pairs} matching pairs between accounts "
+              f"{'flagged' if transfers == 'flag' else 'merged into transfer rows'}")
+    transactions.sort_by_date()
+    if report_file:
+        update_report(report_file, transactions)
+
+    if split or max_rows:
+        shards = write_sharded_import_files(transactions, output_file, split or ('account' if per_account else None),
+                                            max_rows, max_open_files)
+        output_files = [shard['file'] for shard in shards]
+    elif not per_account:
+        output_files = [create_realbyte_import_file(transactions, output_file)]
+    else:
+        output_files = [
+            create_realbyte_import_file(account_transactions, _account_output_file(output_file, account))
+            for account, account_transactions in transactions.split_by_account().items()
+        ]
+
+    if ledger is not None:
+        ledger.commit()
+    return output_files
+
+WATCH_POLL_INTERVAL = 1.0
+WATCH_SETTLE_TIME = 2.0
+
+def _scan_statements(folder):
+    """
+    Return {path: (mtime_ns, size)} for the statements directly inside a folder
+    """
+    found = {}
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if entry.name.lower().endswith(STATEMENT_EXTENSIONS) and entry.is_file():
+                info = entry.stat()
+                found[entry.path] = (info.st_mtime_ns, info.st_size)
+    return found
+
+def _init_watch_worker(cache_dir, parse_cache_dir=None, quarantine_file=None, max_errors=None):
+    """
+    Warm up a watch worker once: open the category cache and load pandas if
+    it is installed, so the first Equitas statement is not slowed down.
+    Ctrl+C and SIGTERM are left to the watching process, which shuts the pool down.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    _init_batch_worker(cache_dir, parse_cache_dir, quarantine_file, max_errors)
+    try:
+        import pandas
+    except ImportError:
+        pass
+
+class FolderWatcher:
+    """
+    Poll a folder for new or changed statements and append their new
+    transactions to one RealByte file per account. A file is only converted
+    once its size and modification time have stayed the same for settle_time
+    seconds, so statements still being downloaded are not read half written.
+    """
+
+    def __init__(self, folder, output_file, ledger, poll_interval=WATCH_POLL_INTERVAL, settle_time=WATCH_SETTLE_TIME,
+                 model=None, report_file=None):
+        self.folder = folder
+        self.output_file = output_file
+        self.ledger = ledger
+        self.model = model
+        self.report_file = report_file
+        self.poll_interval = poll_interval
+        self.settle_time = settle_time
+        self.converted = {}  # path -> (mtime_ns, size) when it was last converted
+        self.pending = {}    # path -> ((mtime_ns, size), time it was first seen that way)
+        self.outputs = set()
+
+    def ready_files(self, now):
+        """
+        Return the (path, signature) of statements that changed since they
+        were last converted and have since settled
+        """
+        found = _scan_statements(self.folder)
+        for path in list(self.pending):
+            if path not in found:
+                del self.pending[path]
+
+        ready = []
+        for path, signature in sorted(found.items()):
+            if self.converted.get(path) == signature or os.path.abspath(path) in self.outputs:
+                continue
+            seen = self.pending.get(path)
+            if seen is None or seen[0] != signature:
+                self.pending[path] = (signature, now)
+            elif now - seen[1] >= self.settle_time:
+                del self.pending[path]
+                ready.append((path, signature))
+        return ready
+
+    def append(self, input_file, transactions):
+        """
+        Append the transactions of one statement that were not exported
+        before to the per-account output files
+        """
+        transactions = self.ledger.filter_new(transactions)
+        if self.model is not None:
+            transactions = self.model.categorize(transactions)
+        new = TransactionBatch(transactions)
+        if not new:
+            print(f"{input_file}: no new transactions")
+            return
+        new.sort_by_date()
+        for account, account_transactions in new.split_by_account().items():
+            output_file = _account_output_file(self.output_file, account)
+            self.outputs.add(os.path.abspath(output_file))
+            create_realbyte_import_file(account_transactions, output_file, append=True)
+        if self.report_file:
+            update_report(self.report_file, new)
+        self.ledger.commit()
+
+    @staticmethod
+    def report_errors(quarantined):
+        """
+        Print the quarantine summary of one converted statement, if it had
+        rejected rows or skipped lines
+        """
+        if quarantined['counts'] or quarantined['skipped']:
+            _quarantine.reset()
+            _quarantine.merge(quarantined)
+            print(_quarantine.summary())
+            _quarantine.reset()
+
+    async def run(self, pool):
+        """
+        Convert settled statements on the worker pool until cancelled
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        print(f"Watching {self.folder} for statements (Ctrl+C to stop)")
+        while True:
+            jobs = []
+            for path, signature in self.ready_files(loop.time()):
+                # A file that cannot be converted is retried only once it changes
+                self.converted[path] = signature
+                job = _batch_job(path, _bank_from_name(os.path.basename(path)))
+                if job is not None:
+                    jobs.append(job)
+
+            results = await asyncio.gather(
+                *(loop.run_in_executor(pool, _parse_batch_job, job) for job in jobs), return_exceptions=True)
+            for (input_file, bank, _), result in zip(jobs, results):
+                if isinstance(result, Exception):
+                    print(f"{input_file} ({bank}): failed: {result}")
+                    if isinstance(result, TooManyErrors) and len(result.args) > 1:
+                        self.report_errors(result.args[1])
+                    continue
+                transactions, _, pipeline_stats, quarantined = result
+                print(f"{input_file} ({bank}): {len(transactions)} transactions")
+                _stats.merge(pipeline_stats)
+                self.report_errors(quarantined)
+                self.append(input_file, transactions)
+
+            await asyncio.sleep(self.poll_interval)
+
+def _stop_watching(signum, frame):
+    raise KeyboardInterrupt
+
+def watch_folder(folder, output_file, workers=None, cache_dir=DEFAULT_CACHE_DIR, ledger=None,
+                 poll_interval=WATCH_POLL_INTERVAL, settle_time=WATCH_SETTLE_TIME, model=None, parse_cache_dir=None,
+                 report_file=None):
+    """
+    Keep converting the statements dropped into a folder until interrupted.
+    Worker processes stay up between files, so pandas, the compiled
+    categorizer and the category cache are only loaded once. Without a
+    ledger, already exported transactions are remembered for this run only.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    if ledger is None:
+        ledger = ImportLedger(':memory:')
+    watcher = FolderWatcher(folder, output_file, ledger, poll_interval, settle_time, model, report_file)
+    # Stop cleanly when run as a service, too
+    signal.signal(signal.SIGTERM, _stop_watching)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_watch_worker,
+                             initargs=(cache_dir, parse_cache_dir, _quarantine.path, _quarantine.max_errors)) as pool:
+        try:
+            # Only watch runs need asyncio, which is slow to import
+            import asyncio
+            asyncio.run(watcher.run(pool))
+        except KeyboardInterrupt:
+            print("Stopped watching")
+    print(ledger.summary())
+    ledger.close()
+    if model is not None:
+        print(model.summary())
+
+SERVE_ADDRESS = '127.0.0.1:8765'
+SERVE_FORMATS = ('tsv', 'json')
+SERVE_MAX_UPLOAD_MB = 256
+
+_server_model = None
+
+def _init_serve_worker(cache_dir, parse_cache_dir=None, max_errors=None, model_file=None):
+    """
+    Warm up a server worker like a watch worker, and load the category model once
+    """
+    global _server_model
+    _init_watch_worker(cache_dir, parse_cache_dir, None, max_errors)
+    if model_file:
+        _server_model = CategoryModel.load(model_file)
+
+def _convert_upload(data, bank, output_format, name):
+    """
+    Convert one uploaded statement in a server worker.
+    Returns the bank (None if it could not be detected), the number of
+    transactions, the quarantine counts and the response body.
+    """
+    import tempfile
+
+    _quarantine.reset()
+    # Parsers read from a path, so the upload goes to a temporary file first
+    with tempfile.NamedTemporaryFile(prefix='mmscript-', suffix=os.path.splitext(name)[1], delete=False) as file:
+        file.write(data)
+    try:
+        header_offset = None
+        if bank == 'auto':
+            bank, header_offset = detect_bank(file.name)
+            if bank is None:
+                return None, 0, _quarantine.to_dict(), b''
+        try:
+            transactions = parse_statement(file.name, bank, header_offset) or []
+        except TooManyErrors as e:
+            raise TooManyErrors(str(e).replace(file.name, name), _upload_errors(name)) from None
+        if _server_model is not None:
+            transactions = _server_model.categorize(transactions)
+        rows = [_realbyte_row(trans) for trans in transactions]
+        _category_cache.flush()
+    finally:
+        os.remove(file.name)
+
+    if output_format == 'json':
+        body = json.dumps({'bank': bank, 'transactions': [dict(zip(REALBYTE_HEADERS, row)) for row in rows],
+                           'rejected': _upload_errors(name)}, ensure_ascii=False)
+    else:
+        buffer = StringIO()
+        writer = csv.writer(buffer, delimiter='\t', lineterminator=os.linesep)
+        writer.writerow(REALBYTE_HEADERS)
+        writer.writerows(rows)
+        body = buffer.getvalue()
+    return bank, len(rows), _upload_errors(name), body.encode('utf-8')
+
+def _upload_errors(name):
+    """
+    Return the quarantine counts of an upload, with the temporary file replaced by its name
+    """
+    quarantined = _quarantine.to_dict()
+    for record in quarantined['samples'] + quarantined['skipped']:
+        record['file'] = name
+    return quarantined
+
+def _make_conversion_server(address, pool, max_upload_bytes):
+    """
+    Create an HTTP server answering conversion requests on pool. An address
+    containing a path separator is a Unix socket, anything else is [host:]port.
+    Statements larger than max_upload_bytes are refused.
+    """
+    import socket
+    import socketserver
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qs, urlsplit
+
+    class ConversionHandler(BaseHTTPRequestHandler):
+        """
+        POST /convert?bank=<bank|auto>&format=<tsv|json>&name=<file name> with
+        the statement as the request body returns its RealByte rows;
+        GET /health tells whether the server is up and which banks it knows.
+        """
+        protocol_version = 'HTTP/1.1'
+
+        def send_body(self, status, body, content_type, headers=(), close=False):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            for header, value in headers:
+                self.send_header(header, value)
+            if close:
+                # The request body was not read, so the connection cannot be reused
+                self.send_header('Connection', 'close')
+                self.close_connection = True
+            self.end_headers()
+            self.wfile.write(body)
+
+        def send_json(self, status, data, close=False):
+            self.send_body(status, json.dumps(data, ensure_ascii=False).encode('utf-8'), 'application/json',
+                           close=close)
+
+        def do_GET(self):
+            if urlsplit(self.path).path != '/health':
+                self.send_json(404, {'error': "unknown path; use POST /convert or GET /health"})
+                return
+            self.send_json(200, {'status': 'ok', 'banks': sorted(PARSERS)})
+
+        def do_POST(self):
+            url = urlsplit(self.path)
+            query = parse_qs(url.query)
+            bank = query.get('bank', ['auto'])[0].lower()
+            output_format = query.get('format', ['tsv'])[0].lower()
+            name = query.get('name', ['statement'])[0]
+            length = self.headers.get('Content-Length')
+            if length is None:
+                self.send_json(411, {'error': "send the statement as the request body, with a Content-Length"},
+                               close=True)
+                return
+            try:
+                length = int(length)
+            except ValueError:
+                length = -1
+            if length < 0:
+                self.send_json(400, {'error': "Content-Length must be a non-negative whole number"}, close=True)
+                return
+            if length > max_upload_bytes:
+                self.send_json(413, {'error': f"statement is larger than the {max_upload_bytes} bytes allowed"},
+                               close=True)
+                return
+            data = self.rfile.read(length)
+            if url.path != '/convert':
+                self.send_json(404, {'error': "unknown path; use POST /convert or GET /health"})
+                return
+            if bank not in PARSERS and bank != 'auto':
+                self.send_json(400, {'error': f"unknown bank '{bank}'; use one of {', '.join(sorted(PARSERS))} or auto"})
+                return
+            if output_format not in SERVE_FORMATS:
+                self.send_json(400, {'error': f"unknown format '{output_format}'; use tsv or json"})
+                return
+
+            start = time.perf_counter()
+            try:
+                bank, rows, quarantined, body = pool.submit(_convert_upload, data, bank, output_format, name).result()
+            except TooManyErrors as e:
+                print(f"{name}: stopped: {e}")
+                self.send_json(422, {'error': str(e), 'rejected': e.args[1] if len(e.args) > 1 else None})
+                return
+            except Exception as e:
+                print(f"{name}: failed: {e}")
+                self.send_json(500, {'error': f"{type(e).__name__}: {e}"})
+                return
+            if bank is None:
+                self.send_json(400, {'error': "could not detect the bank from the statement; pass bank=<bank>"})
+                return
+
+            rejected = sum(quarantined['counts'].values())
+            print(f"{name} ({bank}): {rows} transactions, {rejected} rejected rows "
+                  f"in {(time.perf_counter() - start) * 1000:.0f} ms")
+            content_type = 'application/json' if output_format == 'json' else 'text/tab-separated-values; charset=utf-8'
+            self.send_body(200, body, content_type,
+                           [('X-Bank', bank), ('X-Transactions', str(rows)), ('X-Rejected-Rows', str(rejected))])
+
+        def log_message(self, format, *args):
+            # Conversions are reported by do_POST instead of one access log line per request
+            pass
+
+    class ConversionServer(ThreadingHTTPServer):
+        # Let bursts of scripted requests queue up instead of being refused
+        request_queue_size = 128
+
+    if os.sep in address or (os.altsep and os.altsep in address):
+        class UnixConversionServer(ConversionServer):
+            address_family = socket.AF_UNIX
+
+            def server_bind(self):
+                # HTTPServer.server_bind expects a (host, port) address
+                socketserver.TCPServer.server_bind(self)
+                self.server_name, self.server_port = 'localhost', 0
+
+        if os.path.exists(address):
+            import stat
+            if not stat.S_ISSOCK(os.stat(address).st_mode):
+                raise ValueError(f"{address} exists and is not a socket")
+            os.remove(address)  # left behind by a server that did not stop cleanly
+        return UnixConversionServer(address, ConversionHandler)
+
+    host, _, port = address.rpartition(':')
+    return ConversionServer((host or '127.0.0.1', int(port)), ConversionHandler)
+
+def serve_conversions(address=SERVE_ADDRESS, workers=None, cache_dir=DEFAULT_CACHE_DIR, parse_cache_dir=None,
+                      model_file=None, max_errors=None, max_upload_mb=SERVE_MAX_UPLOAD_MB):
+    """
+    Convert statements sent over HTTP, on localhost or a Unix socket, until
+    interrupted. Worker processes are started up front and stay up, so each
+    request only pays for parsing and categorizing its own statement.
+    Rejected rows are counted in the response instead of a side file.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = workers or os.cpu_count() or 1
+    signal.signal(signal.SIGTERM, _stop_watching)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_serve_worker,
+                             initargs=(cache_dir, parse_cache_dir, max_errors, model_file)) as pool:
+        # Start every worker now so the first requests are not slowed down
+        for future in [pool.submit(os.getpid) for _ in range(workers)]:
+            future.result()
+        try:
+            server = _make_conversion_server(address, pool, int(max_upload_mb * 1024 * 1024))
+        except (OSError, ValueError) as e:
+            print(f"Could not listen on {address}: {e}")
+            return
+        print(f"Serving conversions on {address} with {workers} workers (Ctrl+C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("Stopped serving")
+        finally:
+            server.server_close()
+            if isinstance(server.server_address, str):
+                os.remove(server.server_address)  # a Unix socket
+
+def convert(args):
+    """
+    Run the conversion described by the parsed command line arguments
+    """
+    if args.train_model:
+        train_category_model(args.input_file, args.output_file)
+        return
+    if args.serve:
+        serve_conversions(args.serve, workers=args.workers, cache_dir=None if args.no_cache else args.cache_dir,
+                          parse_cache_dir=args.cache_dir if args.parse_cache else None, model_file=args.model,
+                          max_errors=args.max_errors, max_upload_mb=args.max_upload_mb)
+        return
+
+    # Rejected rows go to a side file next to the output, created only if needed
+    quarantine_file = args.quarantine or _unique_output_file(f"{os.path.splitext(args.output_file)[0]}_errors.jsonl")
+    quarantine = open_quarantine(quarantine_file, args.max_errors)
+    try:
+        _convert(args)
+    except TooManyErrors as e:
+        print(f"Stopped: {e}")
+    finally:
+        quarantine.close()
+        summary = quarantine.summary()
+        if summary:
+            print(summary)
+
+def _convert(args):
+    cache_dir = None if args.no_cache else args.cache_dir
+    parse_cache_dir = args.cache_dir if args.parse_cache else None
+    ledger = ImportLedger(args.ledger) if args.ledger else None
+    model = None
+    if args.model:
+        with _stats.timer('model', 'load'):
+            model = CategoryModel.load(args.model)
+
+    if args.watch:
+        if not os.path.isdir(args.input_file):
+            print(f"{args.input_file} is not a folder; --watch needs a folder to watch")
+            return
+        watch_folder(args.input_file, args.output_file, workers=args.workers, cache_dir=cache_dir,
+                     ledger=ledger, poll_interval=args.poll_interval, settle_time=args.settle_time, model=model,
+                     parse_cache_dir=parse_cache_dir, report_file=args.report)
+        return
+
+    if args.batch:
+        print(f"Batch converting statements from {args.input_file}")
+        convert_batch(args.input_file, args.output_file, per_account=args.per_account,
+                      workers=args.workers, cache_dir=cache_dir, ledger=ledger, model=model,
+                      parse_cache_dir=parse_cache_dir, transfers=args.transfers,
+                      transfer_window=args.transfer_window, report_file=args.report, split=args.split,
+                      max_rows=args.max_rows, max_open_files=args.max_open_files)
+        if ledger is not None:
+            ledger.close()
+        return
+
+    input_file = args.input_file
+    output_file = args.output_file
+    bank = args.bank
+    header_offset = None
+
+    if bank == 'auto':
+        bank, header_offset = detect_bank(input_file)
+        if bank is None:
+            print(f"Could not detect the bank for {input_file}; pass it explicitly")
+            return
+        print(f"Detected {bank} statement")
+
+    print(f"Processing {input_file} for bank: {bank}")
+    cache = open_category_cache(cache_dir)
+    open_parse_cache(parse_cache_dir)
+
+    # Process the statement, streaming it if the bank's parser supports that
+    # and it is not being cached
+    transactions = parse_statement(input_file, bank, header_offset, streaming=True)
+
+    transactions = iter(transactions or [])
+    if ledger is not None:
+        transactions = ledger.filter_new(transactions)
+    if model is not None:
+        transactions = model.categorize(transactions)
+
+    # The report needs all the transactions at once
+    report_transactions = None
+    if args.report:
+        report_transactions = TransactionBatch(transactions)
+        transactions = iter(report_transactions)
+
+    # Peek at the first transaction so streaming parsers can be written out
+    # as they are read, without creating an empty file when nothing parses
+    first = next(transactions, None)
+    if first is not None and (args.split or args.max_rows):
+        write_sharded_import_files(itertools.chain([first], transactions), output_file, args.split, args.max_rows,
+                                   args.max_open_files)
+    elif first is not None:
+        create_realbyte_import_file(itertools.chain([first], transactions), output_file)
+    elif ledger is not None and ledger.skipped:
+        print("No new transactions (all already exported)")
+    else:
+        print("No transactions found or error in processing the statement")
+        detected, _ = detect_bank(input_file)
+        if detected is not None and detected != bank:
+            print(f"The file looks like a {detected} statement; try '{detected}' or 'auto' as the bank")
+
+    if report_transactions:
+        update_report(args.report, report_transactions)
+
+    if ledger is not None:
+        ledger.commit()
+        ledger.close()
+        print(ledger.summary())
+
+    if model is not None:
+        print(model.summary())
+
+    cache.close()
+    print(format_cache_stats(cache.stats()))
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert bank statements into the RealByte Money Manager import format")
+    parser.add_argument('input_file', nargs='?', help="statement to convert, or a folder/manifest with --batch")
+    parser.add_argument('output_file', nargs='?', help="RealByte TSV file to write")
+    parser.add_argument('bank', nargs='?', default='auto', choices=sorted(PARSERS) + ['auto'],
+                        help="bank the statement comes from (default: detect it from the file header)")
+    parser.add_argument('--batch', action='store_true', help="convert every statement in a folder or manifest file")
+    parser.add_argument('--per-account', action='store_true', help="with --batch, write one output file per account")
+    parser.add_argument('--workers', type=int, default=None, help="with --batch, --watch or --serve, number of worker processes")
+    parser.add_argument('--split', choices=SPLIT_CHOICES,
+                        help="write one output file per account, per month or per account and month, "
+                             "plus a manifest listing them")
+    parser.add_argument('--max-rows', type=int,
+                        help="cut output files into parts of at most this many transactions, plus a manifest listing them")
+    parser.add_argument('--max-open-files', type=int, default=MAX_OPEN_SHARDS,
+                        help="with --split or --max-rows, maximum number of output files kept open at once")
+    parser.add_argument('--transfers', choices=['off', 'merge', 'flag'], default='off',
+                        help="with --batch, find the same money leaving one account and arriving in another and "
+                             "merge each pair into a transfer row or flag both rows as 'Transfer'")
+    parser.add_argument('--transfer-window', type=int, default=TRANSFER_WINDOW_DAYS,
+                        help="with --transfers, maximum days between the two sides of a transfer")
+    parser.add_argument('--report',
+                        help="add the monthly totals per account, category and type of the converted transactions "
+                             "to this TSV (or .json) report")
+    parser.add_argument('--watch', action='store_true',
+                        help="keep watching a folder and append new transactions to one output file per account")
+    parser.add_argument('--poll-interval', type=float, default=WATCH_POLL_INTERVAL,
+                        help="with --watch, seconds between folder scans")
+    parser.add_argument('--settle-time', type=float, default=WATCH_SETTLE_TIME,
+                        help="with --watch, seconds a file must stay unchanged before it is converted")
+    parser.add_argument('--serve', nargs='?', const=SERVE_ADDRESS, metavar='ADDRESS',
+                        help="instead of converting files, answer conversion requests over HTTP on [host:]port or a "
+                             f"Unix socket path (default: {SERVE_ADDRESS})")
+    parser.add_argument('--max-upload-mb', type=float, default=SERVE_MAX_UPLOAD_MB,
+                        help="with --serve, largest statement accepted, in MB")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help="folder for the persistent category cache")
+    parser.add_argument('--no-cache', action='store_true', help="do not read or write the persistent category cache")
+    parser.add_argument('--parse-cache', action='store_true',
+                        help="keep parsed statements in the cache folder and reuse them while the file is unchanged "
+                             "(needs pyarrow)")
+    parser.add_argument('--ledger', help="ledger file of exported transactions; only new ones are written and recorded")
+    parser.add_argument('--model', help="category model from --train-model, used for transactions the keyword rules leave unknown")
+    parser.add_argument('--train-model', action='store_true',
+                        help="train a category model on the RealByte files in input_file (a file or folder) and save it to output_file")
+    parser.add_argument('--quarantine',
+                        help="JSON Lines file for rows that could not be converted (default: <output>_errors.jsonl)")
+    parser.add_argument('--max-errors', type=int,
+                        help="give up on a statement after this many rows could not be converted")
+    parser.add_argument('--stats', action='store_true', help="print per-stage timings and counters")
+    parser.add_argument('--stats-file', help="save per-stage timings and counters as JSON")
+    args = parser.parse_args()
+    if not args.serve and (args.input_file is None or args.output_file is None):
+        parser.error("the following arguments are required: input_file, output_file")
+    if args.max_rows is not None and args.max_rows < 1:
+        parser.error("--max-rows must be at least 1")
+    if args.max_open_files < 1:
+        parser.error("--max-open-files must be at least 1")
+    if args.max_upload_mb <= 0:
+        parser.error("--max-upload-mb must be more than 0")
+
+    start = time.perf_counter()
+    convert(args)
+    _stats.add('total', 'run', time.perf_counter() - start)
+
+    if args.stats:
+        print(_stats.summary_table())
+    if args.stats_file:
+        _stats.save(args.stats_file)
+        print(f"Stats saved to {args.stats_file}")
 
 if __name__ == "__main__":
     main()